@@ -1,6 +1,168 @@
 """The common module contains common functions and classes used by the other modules."""
 
+import math
+import os
+import warnings
+from functools import lru_cache
+from pathlib import Path
+
+import orjson
+
+# Downloaded and converted files are kept here so they survive kernel restarts
+_CACHE_DIR = Path(
+    os.environ.get("SALMONGIS_CACHE_DIR", Path.home() / ".salmongis_cache")
+)
+
 
 def hello_world():
     """Prints "Hello World!" to the console."""
     print("Hello World!")
+
+
+@lru_cache(maxsize=1)
+def _arrow_available():
+    """Checks whether pyogrio can hand GDAL's Arrow stream straight to pyarrow.
+
+    Returns:
+        bool: True if pyarrow is installed and pyogrio is built against GDAL >= 3.6.
+    """
+    try:
+        import pyarrow  # noqa: F401
+        import pyogrio
+    except ImportError:
+        return False
+    return pyogrio.__gdal_version__ >= (3, 6, 0)
+
+
+def read_vector(data, **kwargs):
+    """Reads a vector dataset into a GeoDataFrame using the pyogrio engine.
+
+    Args:
+        data (str): The file path or URL to the vector data.
+        **kwargs: Additional keyword arguments for geopandas.read_file.
+
+    Returns:
+        geopandas.GeoDataFrame: The loaded vector data.
+    """
+    import geopandas as gpd
+
+    kwargs.setdefault("engine", "pyogrio")
+    if kwargs["engine"] == "pyogrio":
+        kwargs.setdefault("use_arrow", _arrow_available())
+    return gpd.read_file(data, **kwargs)
+
+
+def iter_vector(data, chunksize, **kwargs):
+    """Reads a vector dataset in chunks so it never has to fit in memory at once.
+
+    Args:
+        data (str): The file path or URL to the vector data.
+        chunksize (int): The maximum number of features per chunk.
+        **kwargs: Additional keyword arguments for pyogrio, e.g. bbox or mask.
+
+    Yields:
+        geopandas.GeoDataFrame: Consecutive chunks of the dataset.
+    """
+    import geopandas as gpd
+
+    # GeoDataFrame.from_arrow only exists in geopandas 1.0 and later
+    if _arrow_available() and hasattr(gpd.GeoDataFrame, "from_arrow"):
+        import pyogrio
+
+        with pyogrio.open_arrow(
+            data, batch_size=chunksize, use_pyarrow=True, **kwargs
+        ) as (meta, reader):
+            for batch in reader:
+                gdf = gpd.GeoDataFrame.from_arrow(batch)
+                if gdf.crs is None and meta["crs"]:
+                    gdf = gdf.set_crs(meta["crs"])
+                yield gdf
+        return
+
+    offset = 0
+    while True:
+        gdf = read_vector(data, skip_features=offset, max_features=chunksize, **kwargs)
+        if len(gdf):
+            yield gdf
+        if len(gdf) < chunksize:
+            break
+        offset += chunksize
+
+
+def to_wgs84(gdf):
+    """Reprojects a GeoDataFrame to EPSG:4326 unless it is already in it.
+
+    Args:
+        gdf (geopandas.GeoDataFrame): The GeoDataFrame to reproject.
+
+    Returns:
+        geopandas.GeoDataFrame: The GeoDataFrame in EPSG:4326. GeoDataFrames
+            without a CRS are returned unchanged with a warning.
+    """
+    if gdf.crs is None:
+        warnings.warn("GeoDataFrame has no CRS set; assuming EPSG:4326.")
+    elif gdf.crs.to_epsg() != 4326:
+        gdf = gdf.to_crs(epsg=4326)
+    return gdf
+
+
+def gdf_to_geojson(gdf):
+    """Converts a GeoDataFrame to a GeoJSON FeatureCollection dictionary.
+
+    Geometries are encoded in one vectorized shapely call and properties with
+    pandas' JSON writer, so no per-feature Python objects are built until the
+    final parse. This is considerably faster than gdf.__geo_interface__ for
+    large layers.
+
+    Args:
+        gdf (geopandas.GeoDataFrame): The GeoDataFrame to convert.
+
+    Returns:
+        dict: The GeoJSON FeatureCollection.
+    """
+    import shapely
+
+    geometries = shapely.to_geojson(gdf.geometry.values)
+    geometries = orjson.loads(
+        "[" + ",".join("null" if g is None else g for g in geometries) + "]"
+    )
+    properties = orjson.loads(
+        gdf.drop(columns=gdf.geometry.name).to_json(
+            orient="records", date_format="iso"
+        )
+    )
+    features = [
+        {"id": str(index), "type": "Feature", "properties": props, "geometry": geom}
+        for index, props, geom in zip(gdf.index, properties, geometries)
+    ]
+    return {"type": "FeatureCollection", "features": features}
+
+
+def _geojson_total_bounds(data):
+    """Computes the bounds of GeoJSON data in one vectorized shapely call.
+
+    Features with a null geometry, which is valid GeoJSON, are skipped.
+
+    Args:
+        data (dict): A GeoJSON FeatureCollection, Feature or geometry.
+
+    Returns:
+        tuple: The bounds as (minx, miny, maxx, maxy), or None if the data has
+            no coordinates.
+    """
+    import shapely
+
+    if data.get("type") == "FeatureCollection":
+        geometries = [f.get("geometry") for f in data.get("features") or ()]
+    elif data.get("type") == "Feature":
+        geometries = [data.get("geometry")]
+    else:
+        geometries = [data]
+    geometries = [orjson.dumps(g) for g in geometries if g]
+    if not geometries:
+        return None
+
+    bounds = tuple(map(float, shapely.total_bounds(shapely.from_geojson(geometries))))
+    if not all(map(math.isfinite, bounds)):
+        return None
+    return bounds
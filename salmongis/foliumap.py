@@ -2,10 +2,129 @@
 This module provides a custom map class extending folium.Map!
 """
 
+from __future__ import annotations
+
+import hashlib
+import math
+import os
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from types import MappingProxyType
+
 import folium
-import geopandas as gpd
-from typing import Union, Tuple, Dict
-from folium.plugins import DualMap
+import orjson
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple, Union
+from folium.plugins import SideBySideLayers
+
+if TYPE_CHECKING:
+    import geopandas as gpd
+
+from .common import (
+    _CACHE_DIR,
+    _arrow_available,
+    _geojson_total_bounds,
+    gdf_to_geojson,
+    iter_vector,
+    read_vector,
+    to_wgs84,
+)
+
+_BASEMAPS = MappingProxyType(
+    {
+        "OpenStreetMap": "https://{s}.tile.openstreetmap.org/{z}/{x}/{y}.png",
+        "Stamen Terrain": "http://{s}.tile.stamen.com/terrain/{z}/{x}/{y}.png",
+        "Stamen Toner": "http://{s}.tile.stamen.com/toner/{z}/{x}/{y}.png",
+        "Stamen Watercolor": "http://{s}.tile.stamen.com/watercolor/{z}/{x}/{y}.jpg",
+    }
+)
+_BASEMAP_NAMES = frozenset(_BASEMAPS)
+
+
+def _read_wgs84_geojson(path: str) -> Optional[Dict]:
+    """Parses a GeoJSON file directly, skipping the GeoDataFrame round trip.
+
+    Args:
+        path (str): The path to the GeoJSON file.
+
+    Returns:
+        dict or None: The parsed GeoJSON, or None if the file declares a legacy
+            "crs" member other than WGS84 and needs reprojecting.
+    """
+    with open(path, "rb") as f:
+        geojson = orjson.loads(f.read())
+    # Some exporters write "crs": null, which means the GeoJSON default of WGS84
+    crs = ((geojson.get("crs") or {}).get("properties") or {}).get("name") or ""
+    if crs and not crs.endswith(("CRS84", "4326")):
+        return None
+    return geojson
+
+
+def _is_geodataframe(data: Any) -> bool:
+    """Checks for a GeoDataFrame without importing geopandas.
+
+    Args:
+        data: The object to check.
+
+    Returns:
+        bool: True if data is a geopandas.GeoDataFrame.
+    """
+    gpd = sys.modules.get("geopandas")
+    return gpd is not None and isinstance(data, gpd.GeoDataFrame)
+
+
+_SHP_SIDECARS = frozenset((".shp", ".shx", ".dbf", ".prj", ".cpg"))
+
+
+def _read_shp_cached(path: str) -> gpd.GeoDataFrame:
+    """Reads a shapefile through a GeoParquet copy in the salmongis cache directory.
+
+    The copy is rebuilt whenever any of the shapefile's component files is
+    newer than it. Component files are matched case-insensitively, so both
+    roads.shp and ROADS.SHP work. If pyarrow is missing or the copy cannot be
+    read or written, the shapefile is read directly.
+
+    Args:
+        path (str): The path to the .shp file.
+
+    Returns:
+        geopandas.GeoDataFrame: The shapefile contents.
+    """
+    shp = Path(path).resolve()
+    sources = [
+        p
+        for p in shp.parent.iterdir()
+        if p.stem == shp.stem and p.suffix.lower() in _SHP_SIDECARS
+    ]
+    if not sources or not _arrow_available():
+        return read_vector(path)
+
+    import geopandas as gpd
+
+    key = hashlib.sha1(str(shp).encode()).hexdigest()
+    cache = _CACHE_DIR / "shp" / f"{key}.parquet"
+    mtime = max(src.stat().st_mtime for src in sources)
+    if cache.exists() and cache.stat().st_mtime >= mtime:
+        try:
+            return gpd.read_parquet(cache)
+        except Exception:
+            pass
+
+    gdf = read_vector(path)
+    tmp = None
+    try:
+        cache.parent.mkdir(parents=True, exist_ok=True)
+        # Write to a unique temporary file so a failed write never leaves a partial copy
+        fd, tmp = tempfile.mkstemp(dir=cache.parent, suffix=".tmp")
+        os.close(fd)
+        gdf.to_parquet(tmp)
+        os.replace(tmp, cache)
+    except Exception:
+        # The copy is only an optimization; the data itself was read fine
+        if tmp is not None and os.path.exists(tmp):
+            os.remove(tmp)
+    return gdf
 
 
 class Map(folium.Map):
@@ -17,17 +136,20 @@ class Map(folium.Map):
         """
         Initializes the map with a given center and zoom level.
 
+        No layer control is added; call add_layer_control() once the layers
+        have been added.
+
         Args:
             center (tuple): The initial center of the map as (latitude, longitude).
             zoom (int): The initial zoom level of the map.
             **kwargs: Additional keyword arguments for folium.Map.
         """
         super().__init__(location=center, zoom_start=zoom, **kwargs)
-        folium.LayerControl().add_to(self)
+        self._basemap_layers: Dict[str, folium.TileLayer] = {}
         
     def add_geojson(
         self,
-        data: Union[str, Dict],
+        data: Union[str, Dict, gpd.GeoDataFrame],
         zoom_to_layer: bool = True,
         hover_style: Dict = None,
         **kwargs,
@@ -35,7 +157,8 @@ class Map(folium.Map):
         """Adds a GeoJSON layer to the map.
 
         Args:
-            data (str or dict): The GeoJSON data. Can be a file path (str) or a dictionary.
+            data (str, dict, or geopandas.GeoDataFrame): The GeoJSON data. Can be a
+                file path (str), a dictionary, or a GeoDataFrame.
             zoom_to_layer (bool, optional): Whether to zoom to the layer's bounds. Defaults to True.
             hover_style (dict, optional): Style to apply when hovering over features. Defaults to {"color": "yellow", "fillOpacity": 0.2}.
             **kwargs: Additional keyword arguments for the folium.GeoJson layer.
@@ -47,27 +170,152 @@ class Map(folium.Map):
             hover_style = {"color": "yellow", "fillOpacity": 0.2}
 
         if isinstance(data, str):
-            gdf = gpd.read_file(data)
-            geojson = gdf.__geo_interface__
+            geojson = None
+            if data.lower().endswith((".geojson", ".json")) and os.path.isfile(data):
+                geojson = _read_wgs84_geojson(data)
+            if geojson is None:
+                data = read_vector(data)
+
+        bounds = None
+        if _is_geodataframe(data):
+            gdf = to_wgs84(data)
+            geojson = gdf_to_geojson(gdf)
+            if zoom_to_layer:
+                bounds = gdf.total_bounds
         elif isinstance(data, dict):
             geojson = data
-        else:
+        elif not isinstance(data, str):
             raise ValueError("Invalid data type")
 
+        if zoom_to_layer and bounds is None:
+            # Features without a geometry are skipped; None if nothing is left
+            bounds = _geojson_total_bounds(geojson)
+
         geojson_layer = folium.GeoJson(data=geojson, **kwargs)
         geojson_layer.add_to(self)
 
-    def add_shp(self, data: str, **kwargs) -> None:
+        if zoom_to_layer and bounds is not None and all(map(math.isfinite, bounds)):
+            minx, miny, maxx, maxy = bounds
+            self.fit_bounds([[miny, minx], [maxy, maxx]])
+
+    def add_shp(
+        self,
+        data: str,
+        bbox: Optional[Tuple[float, float, float, float]] = None,
+        mask: Any = None,
+        chunksize: Optional[int] = None,
+        cache: bool = False,
+        **kwargs,
+    ) -> None:
         """Adds a shapefile to the map.
 
         Args:
             data (str): The file path to the shapefile.
+            bbox (tuple, optional): Only read features intersecting this
+                (minx, miny, maxx, maxy) box, in the CRS of the data. Defaults to None.
+            mask (shapely.Geometry or geopandas.GeoDataFrame, optional): Only read
+                features intersecting this geometry. Defaults to None.
+            chunksize (int, optional): Read the file in chunks of this many features
+                to bound peak memory. Defaults to None, which reads it in one go.
+            cache (bool, optional): Keep a GeoParquet copy of a local shapefile in
+                the salmongis cache directory (~/.salmongis_cache, or
+                SALMONGIS_CACHE_DIR) and read that on later calls. Only used for
+                unfiltered reads. Defaults to False.
             **kwargs: Additional keyword arguments for the GeoJSON layer.
         """
-        gdf = gpd.read_file(data)
-        gdf = gdf.to_crs(epsg=4326)
-        geojson = gdf.__geo_interface__
-        self.add_geojson(geojson, **kwargs)
+        if chunksize:
+            self._add_chunked(data, chunksize, bbox=bbox, mask=mask, **kwargs)
+            return
+        if (
+            cache
+            and bbox is None
+            and mask is None
+            and data.lower().endswith(".shp")
+            and os.path.isfile(data)
+        ):
+            gdf = _read_shp_cached(data)
+        else:
+            gdf = read_vector(data, bbox=bbox, mask=mask)
+        self.add_gdf(gdf, **kwargs)
+
+    def _add_chunked(
+        self,
+        data: str,
+        chunksize: int,
+        bbox=None,
+        mask=None,
+        zoom_to_layer: bool = True,
+        hover_style: Dict = None,
+        **kwargs,
+    ) -> None:
+        """Adds a vector file chunk by chunk into a single feature group.
+
+        Args:
+            data (str): The file path or URL to the vector data.
+            chunksize (int): The maximum number of features per chunk.
+            bbox (tuple, optional): The bounding box filter. Defaults to None.
+            mask (shapely.Geometry, optional): The geometry filter. Defaults to None.
+            zoom_to_layer (bool, optional): Whether to zoom to the bounds of all
+                chunks. Defaults to True.
+            hover_style (dict, optional): Accepted for parity with add_geojson.
+                Defaults to None.
+            **kwargs: Additional keyword arguments for folium.GeoJson.
+        """
+        group = folium.FeatureGroup(name=kwargs.get("name"))
+        minx = miny = math.inf
+        maxx = maxy = -math.inf
+        for gdf in iter_vector(data, chunksize, bbox=bbox, mask=mask):
+            gdf = to_wgs84(gdf)
+            folium.GeoJson(data=gdf_to_geojson(gdf), **kwargs).add_to(group)
+            if zoom_to_layer:
+                x0, y0, x1, y1 = gdf.total_bounds
+                minx, miny = min(minx, x0), min(miny, y0)
+                maxx, maxy = max(maxx, x1), max(maxy, y1)
+        group.add_to(self)
+
+        if zoom_to_layer and all(map(math.isfinite, (minx, miny, maxx, maxy))):
+            self.fit_bounds([[miny, minx], [maxy, maxx]])
+
+    def add_vectors(
+        self,
+        paths: List[str],
+        group_name: str = "layers",
+        zoom_to_layer: bool = True,
+        hover_style: Dict = None,
+        **kwargs,
+    ) -> None:
+        """Adds several vector files to the map as a single layer.
+
+        The files are read concurrently, merged into one GeoDataFrame and added
+        as one GeoJSON layer inside a feature group, instead of one layer each.
+
+        Args:
+            paths (list): The file paths or URLs of the vector data.
+            group_name (str, optional): The name of the feature group. Defaults to "layers".
+            zoom_to_layer (bool, optional): Whether to zoom to the combined bounds
+                of all files. Defaults to True.
+            hover_style (dict, optional): Accepted for parity with add_geojson and
+                not passed on to folium. Defaults to None.
+            **kwargs: Additional keyword arguments for folium.GeoJson, such as
+                style_function or tooltip.
+        """
+        if not paths:
+            return
+
+        import pandas as pd
+
+        with ThreadPoolExecutor() as executor:
+            gdfs = list(executor.map(lambda path: to_wgs84(read_vector(path)), paths))
+
+        gdf = pd.concat(gdfs, ignore_index=True)
+        group = folium.FeatureGroup(name=group_name)
+        folium.GeoJson(data=gdf_to_geojson(gdf), **kwargs).add_to(group)
+        group.add_to(self)
+
+        bounds = gdf.total_bounds
+        if zoom_to_layer and all(map(math.isfinite, bounds)):
+            minx, miny, maxx, maxy = bounds
+            self.fit_bounds([[miny, minx], [maxy, maxx]])
 
     def add_gdf(self, gdf: gpd.GeoDataFrame, **kwargs) -> None:
         """Adds a GeoDataFrame to the map.
@@ -76,9 +324,7 @@ class Map(folium.Map):
             gdf (geopandas.GeoDataFrame): The GeoDataFrame to add.
             **kwargs: Additional keyword arguments for the GeoJSON layer.
         """
-        gdf = gdf.to_crs(epsg=4326)
-        geojson = gdf.__geo_interface__
-        self.add_geojson(geojson, **kwargs)
+        self.add_geojson(gdf, **kwargs)
 
     def add_basemap(self, basemap: str = "OpenStreetMap") -> None:
         """
@@ -87,19 +333,24 @@ class Map(folium.Map):
         Args:
             basemap (str): The name of the basemap to add. Options include:
                 "OpenStreetMap", "Stamen Terrain", "Stamen Toner", "Stamen Watercolor".
-                Defaults to "OpenStreetMap".
+                Defaults to "OpenStreetMap". Adding the same basemap again is a no-op.
         """
-        basemaps = {
-            "OpenStreetMap": "https://{s}.tile.openstreetmap.org/{z}/{x}/{y}.png",
-            "Stamen Terrain": "http://{s}.tile.stamen.com/terrain/{z}/{x}/{y}.png",
-            "Stamen Toner": "http://{s}.tile.stamen.com/toner/{z}/{x}/{y}.png",
-            "Stamen Watercolor": "http://{s}.tile.stamen.com/watercolor/{z}/{x}/{y}.jpg",
-        }
-        folium.TileLayer(
-            tiles=basemaps.get(basemap, basemaps["OpenStreetMap"]), attr=basemap
-        ).add_to(self)
-
-    def add_vector(self, data: Union[str, gpd.GeoDataFrame, Dict], **kwargs) -> None:
+        if basemap in self._basemap_layers:
+            return
+        layer = folium.TileLayer(
+            tiles=_BASEMAPS.get(basemap, _BASEMAPS["OpenStreetMap"]), attr=basemap
+        )
+        layer.add_to(self)
+        self._basemap_layers[basemap] = layer
+
+    def add_vector(
+        self,
+        data: Union[str, gpd.GeoDataFrame, Dict],
+        bbox: Optional[Tuple[float, float, float, float]] = None,
+        mask: Any = None,
+        chunksize: Optional[int] = None,
+        **kwargs,
+    ) -> None:
         """
         Adds a vector layer to the map from various data formats.
 
@@ -108,15 +359,26 @@ class Map(folium.Map):
                 - A file path or URL to a GeoJSON or shapefile.
                 - A GeoDataFrame.
                 - A GeoJSON-like dictionary.
+            bbox (tuple, optional): Only read features intersecting this
+                (minx, miny, maxx, maxy) box, in the CRS of the data. Only used
+                when data is a file path or URL. Defaults to None.
+            mask (shapely.Geometry or geopandas.GeoDataFrame, optional): Only read
+                features intersecting this geometry. Only used when data is a file
+                path or URL. Defaults to None.
+            chunksize (int, optional): Read the file in chunks of this many features
+                to bound peak memory. Only used when data is a file path or URL.
+                Defaults to None, which reads it in one go.
             **kwargs: Additional keyword arguments for folium.GeoJson.
 
         Raises:
             ValueError: If the data type is not supported.
         """
-        if isinstance(data, str):
-            gdf = gpd.read_file(data)
+        if isinstance(data, str) and chunksize:
+            self._add_chunked(data, chunksize, bbox=bbox, mask=mask, **kwargs)
+        elif isinstance(data, str):
+            gdf = read_vector(data, bbox=bbox, mask=mask)
             self.add_gdf(gdf, **kwargs)
-        elif isinstance(data, gpd.GeoDataFrame):
+        elif _is_geodataframe(data):
             self.add_gdf(data, **kwargs)
         elif isinstance(data, dict):
             self.add_geojson(data, **kwargs)
@@ -128,6 +390,7 @@ class Map(folium.Map):
         Adds a layer control widget to the map.
 
         The layer control allows users to toggle visibility of layers on the map.
+        Call it after adding the layers so that only one control is rendered.
         """
         folium.LayerControl().add_to(self)
 
@@ -147,8 +410,13 @@ class Map(folium.Map):
         'contributors, &copy; <a href="https://cartodb.com/attributions">CartoDB</a>'
 )
 
+        if left_basemap in _BASEMAP_NAMES:
+            left_basemap = _BASEMAPS[left_basemap]
+        if right_basemap in _BASEMAP_NAMES:
+            right_basemap = _BASEMAPS[right_basemap]
+
         layer_right = folium.TileLayer(left_basemap, attr=attr)
         layer_left = folium.TileLayer(right_basemap, attr=attr)
 
-        sbs = folium.plugins.SideBySideLayers(layer_left=layer_left, layer_right=layer_right)
+        sbs = SideBySideLayers(layer_left=layer_left, layer_right=layer_right)
         self.add_child(sbs)
\ No newline at end of file
@@ -1,16 +1,734 @@
 """
 This module provides a custom `Map` class that extends `ipyleaflet.Map` to include additional functionality
-such as adding images, videos, COGs, GeoJSON layers, and a collapsible menu.
+such as adding images, COGs, GeoJSON layers, and a collapsible menu.
 """
 
 import ipyleaflet
 from ipyleaflet import GeoJSON
 import ipywidgets as widgets
-from localtileserver import TileClient, get_leaflet_tile_layer
-import ipyfilechooser as filechooser
-import time
-import requests
-import json
+import asyncio
+import atexit
+import collections
+import functools
+import hashlib
+import html
+import logging
+import math
+import os
+import tempfile
+import threading
+import warnings
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+import orjson
+
+from .common import _CACHE_DIR, _geojson_total_bounds
+
+
+class _RepeatFilter(logging.Filter):
+    """Drops a log record if the same message was logged within `interval` seconds."""
+
+    def __init__(self, interval=1.0):
+        """
+        Initializes the filter.
+
+        Args:
+            interval (float, optional): The minimum time in seconds between two
+                identical records. Defaults to 1.0.
+        """
+        super().__init__()
+        self.interval = interval
+        self._last = {}
+
+    def filter(self, record):
+        """
+        Decides whether a record is logged.
+
+        Args:
+            record (logging.LogRecord): The record to check.
+
+        Returns:
+            bool: False if the same message was logged within the interval.
+        """
+        key = (record.levelno, record.getMessage())
+        last = self._last.get(key)
+        if last is not None and record.created - last < self.interval:
+            return False
+        self._last[key] = record.created
+        return True
+
+
+logger = logging.getLogger(__name__)
+logger.addFilter(_RepeatFilter())
+
+# Parsed remote GeoJSON keyed by URL, with the validators needed to revalidate it.
+# Least recently used entries are dropped beyond _GEOJSON_CACHE_SIZE; preload
+# workers update it concurrently, hence the lock.
+_GEOJSON_CACHE = collections.OrderedDict()
+_GEOJSON_CACHE_SIZE = 16
+_GEOJSON_CACHE_LOCK = threading.Lock()
+
+# Downloaded files are evicted, least recently used first, beyond this total size
+_CACHE_MAX_BYTES = 512 * 1024 * 1024
+
+# Extensions of newline-delimited GeoJSON, which holds one feature per line
+_GEOJSON_SEQ_SUFFIXES = (".geojsonl", ".geojsons", ".geojsonseq", ".ndjson", ".jsonl")
+
+# GDAL settings for reading remote COGs with a few HTTP range requests.
+# Settings the user made themselves take precedence.
+_GDAL_REMOTE_DEFAULTS = {
+    "GDAL_DISABLE_READDIR_ON_OPEN": "EMPTY_DIR",
+    "GDAL_HTTP_MULTIPLEX": "YES",
+    "GDAL_HTTP_MERGE_CONSECUTIVE_RANGES": "YES",
+    "CPL_VSIL_CURL_CACHE_SIZE": "200000000",
+}
+
+# GeoJSON layers with at least this many features only send the features in view
+_VIEWPORT_FILTER_MIN_FEATURES = 5000
+
+# Line and polygon layers whose geometries serialize smaller are not simplified
+_SIMPLIFY_MIN_BYTES = 512 * 1024
+
+# The title text is HTML-escaped before it is inserted
+_TITLE_TEMPLATE = (
+    "<div style='color:{color}; font-size:{size}px; text-align:center; "
+    "background-color: transparent;'>{text}</div>"
+)
+
+
+def _resolve_basemap(name):
+    """
+    Looks up a dotted basemap name such as "CartoDB.Positron" in `ipyleaflet.basemaps`.
+
+    Args:
+        name (str): The dotted basemap name.
+
+    Returns:
+        xyzservices.TileProvider: The matching basemap.
+    """
+    return functools.reduce(getattr, name.split("."), ipyleaflet.basemaps)
+
+
+# Basemaps offered by the combined UI, resolved once at import
+_BASEMAPS = {
+    name: _resolve_basemap(name)
+    for name in (
+        "OpenStreetMap.Mapnik",
+        "OpenTopoMap",
+        "CartoDB.Positron",
+        "CartoDB.DarkMatter",
+    )
+}
+
+
+@functools.lru_cache(maxsize=1)
+def _session():
+    """
+    Returns the HTTP session shared by all remote fetches, creating it on first use.
+
+    Returns:
+        requests.Session: The shared session.
+    """
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    session = requests.Session()
+    # Keep enough connections per host for the map's worker threads
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    # Close the pooled connections cleanly when the kernel exits
+    atexit.register(session.close)
+    return session
+
+
+def _memory_cache_get(url):
+    """
+    Looks up a URL in the in-memory GeoJSON cache and marks it as recently used.
+
+    Args:
+        url (str): The URL.
+
+    Returns:
+        tuple: The ETag, the Last-Modified value and the parsed GeoJSON data, or
+            None if the URL is not cached.
+    """
+    with _GEOJSON_CACHE_LOCK:
+        entry = _GEOJSON_CACHE.get(url)
+        if entry is not None:
+            _GEOJSON_CACHE.move_to_end(url)
+        return entry
+
+
+def _memory_cache_put(url, entry):
+    """
+    Stores a URL in the in-memory GeoJSON cache, evicting the oldest entries.
+
+    Args:
+        url (str): The URL.
+        entry (tuple): The ETag, the Last-Modified value and the parsed GeoJSON data.
+    """
+    with _GEOJSON_CACHE_LOCK:
+        _GEOJSON_CACHE[url] = entry
+        _GEOJSON_CACHE.move_to_end(url)
+        while len(_GEOJSON_CACHE) > _GEOJSON_CACHE_SIZE:
+            _GEOJSON_CACHE.popitem(last=False)
+
+
+def _cache_paths(url):
+    """
+    Returns the disk cache files of a URL.
+
+    Args:
+        url (str): The URL.
+
+    Returns:
+        tuple: The paths of the cached body and of its validators.
+    """
+    key = hashlib.sha1(url.encode()).hexdigest()
+    return _CACHE_DIR / f"{key}.body", _CACHE_DIR / f"{key}.meta"
+
+
+def _write_cache(url, content, etag, last_modified):
+    """
+    Stores a downloaded file and its validators in the disk cache.
+
+    Failures are ignored, since the cache is only an optimization.
+
+    Args:
+        url (str): The URL of the file.
+        content (bytes): The downloaded body.
+        etag (str): The ETag response header, if any.
+        last_modified (str): The Last-Modified response header, if any.
+    """
+    body_path, meta_path = _cache_paths(url)
+    try:
+        _CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        for path, data in (
+            (body_path, content),
+            (meta_path, orjson.dumps({"etag": etag, "last_modified": last_modified})),
+        ):
+            # A unique temporary file per write, so concurrent writers never share one
+            fd, tmp_path = tempfile.mkstemp(dir=_CACHE_DIR, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(data)
+                os.replace(tmp_path, path)
+            except OSError:
+                os.remove(tmp_path)
+                raise
+    except OSError:
+        logger.debug("Could not write %s to the cache", url, exc_info=True)
+        return
+    _evict_cache()
+
+
+def _evict_cache():
+    """
+    Deletes the least recently used downloads beyond _CACHE_MAX_BYTES.
+
+    Failures are ignored, since another process may be evicting the same files.
+    """
+    entries = []
+    for body_path in _CACHE_DIR.glob("*.body"):
+        meta_path = body_path.with_suffix(".meta")
+        try:
+            stat = body_path.stat()
+        except OSError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, body_path, meta_path))
+
+    total = sum(size for _, size, _, _ in entries)
+    for _, size, body_path, meta_path in sorted(entries):
+        if total <= _CACHE_MAX_BYTES:
+            break
+        for path in (body_path, meta_path):
+            try:
+                path.unlink()
+            except OSError:
+                pass
+        total -= size
+
+
+def _parse_geojson(content, source):
+    """
+    Parses GeoJSON, or newline-delimited GeoJSON features into a FeatureCollection.
+
+    Newline-delimited sources are recognized by their extension and hold one
+    feature per line. The record separators of RFC 8142 GeoJSON text sequences
+    are accepted as well.
+
+    Args:
+        content (bytes): The raw file content.
+        source (str): The file path or URL the content came from.
+
+    Returns:
+        dict: The parsed GeoJSON data.
+    """
+    if not source.split("?", 1)[0].lower().endswith(_GEOJSON_SEQ_SUFFIXES):
+        return orjson.loads(content)
+    features = []
+    for line in content.splitlines():
+        line = line.strip(b"\x1e \t")
+        if line:
+            features.append(orjson.loads(line))
+    return {"type": "FeatureCollection", "features": features}
+
+
+def _read_cache(url):
+    """
+    Loads a file and its validators from the disk cache.
+
+    Args:
+        url (str): The URL of the file.
+
+    Returns:
+        tuple: The ETag, the Last-Modified value and the parsed GeoJSON data, or
+            None if the URL is not cached.
+    """
+    body_path, meta_path = _cache_paths(url)
+    try:
+        meta = orjson.loads(meta_path.read_bytes())
+        data = _parse_geojson(body_path.read_bytes(), url)
+    except (OSError, orjson.JSONDecodeError):
+        return None
+    # Mark the entry as recently used so eviction keeps it
+    try:
+        os.utime(body_path)
+    except OSError:
+        pass
+    return meta["etag"], meta["last_modified"], data
+
+
+def _fetch_geojson(url):
+    """
+    Downloads and parses a remote GeoJSON file.
+
+    Responses are cached in memory and on disk per URL. Later requests for the
+    same URL send the cached ETag/Last-Modified validators, so an unchanged file
+    costs a single 304 response instead of a full download and parse. If the
+    server cannot be reached or times out, the cached copy is used.
+
+    Args:
+        url (str): The URL of the GeoJSON file.
+
+    Returns:
+        dict: The parsed GeoJSON data.
+    """
+    import requests
+
+    headers = {}
+    cached = _memory_cache_get(url) or _read_cache(url)
+    if cached is not None:
+        etag, last_modified, data = cached
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+
+    try:
+        response = _session().get(url, headers=headers, timeout=30)
+    except (requests.ConnectionError, requests.Timeout):
+        if cached is None:
+            raise
+        logger.warning("Could not reach %s, using the cached copy", url)
+        _memory_cache_put(url, cached)
+        return data
+    if response.status_code == 304 and cached is not None:
+        _memory_cache_put(url, cached)
+        return data
+    response.raise_for_status()
+
+    data = _parse_geojson(response.content, url)
+    etag = response.headers.get("ETag")
+    last_modified = response.headers.get("Last-Modified")
+    _memory_cache_put(url, (etag, last_modified, data))
+    _write_cache(url, response.content, etag, last_modified)
+    return data
+
+
+@functools.lru_cache(maxsize=8)
+def _parse_geojson_file(path, mtime_ns, size):
+    """
+    Parses a local GeoJSON file, memoized per file version.
+
+    Args:
+        path (str): The path of the file.
+        mtime_ns (int): The modification time of the file in nanoseconds.
+        size (int): The size of the file in bytes.
+
+    Returns:
+        dict: The parsed GeoJSON data.
+    """
+    return _parse_geojson(Path(path).read_bytes(), path)
+
+
+def _read_geojson_file(path):
+    """
+    Reads a local GeoJSON file, reusing the parsed data while the file is unchanged.
+
+    Args:
+        path (str): The path of the file.
+
+    Returns:
+        dict: The parsed GeoJSON data.
+    """
+    stat = os.stat(path)
+    return _parse_geojson_file(os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+
+
+def _load_geojson(source):
+    """
+    Loads GeoJSON data from a URL or a local file, using their caches.
+
+    Args:
+        source (str): The file path or URL of the GeoJSON data.
+
+    Returns:
+        dict: The parsed GeoJSON data.
+    """
+    if source.startswith(("http://", "https://")):
+        return _fetch_geojson(source)
+    return _read_geojson_file(source)
+
+
+def _simplify_tolerance(zoom):
+    """
+    Returns a simplification tolerance of about one screen pixel at a zoom level.
+
+    Args:
+        zoom (float): The web map zoom level.
+
+    Returns:
+        float: The tolerance in degrees.
+    """
+    return 360 / (256 * 2**zoom)
+
+
+def _simplify_geojson(data, tolerance):
+    """
+    Simplifies the line and polygon geometries of a GeoJSON FeatureCollection.
+
+    Geometries are simplified with Douglas-Peucker in one vectorized shapely
+    call, preserving topology. Point layers, layers whose geometries are
+    smaller than _SIMPLIFY_MIN_BYTES and other GeoJSON objects are returned
+    unchanged.
+
+    Args:
+        data (dict): The GeoJSON FeatureCollection.
+        tolerance (float): The simplification tolerance in degrees.
+
+    Returns:
+        dict: A new FeatureCollection with simplified geometries.
+    """
+    features = data.get("features")
+    if not features or all(
+        f.get("geometry") is None or f["geometry"]["type"] in ("Point", "MultiPoint")
+        for f in features
+    ):
+        return data
+
+    geometries = [
+        None if f.get("geometry") is None else orjson.dumps(f["geometry"])
+        for f in features
+    ]
+    if sum(len(g) for g in geometries if g is not None) < _SIMPLIFY_MIN_BYTES:
+        return data
+
+    import shapely
+
+    geometries = shapely.from_geojson(geometries)
+    geometries = shapely.simplify(geometries, tolerance, preserve_topology=True)
+    geometries = orjson.loads(
+        "["
+        + ",".join("null" if g is None else g for g in shapely.to_geojson(geometries))
+        + "]"
+    )
+    return {
+        **data,
+        "features": [{**f, "geometry": g} for f, g in zip(features, geometries)],
+    }
+
+
+def _drop_properties(data):
+    """
+    Empties the properties of the features of a GeoJSON FeatureCollection.
+
+    Args:
+        data (dict): The GeoJSON FeatureCollection.
+
+    Returns:
+        dict: A new FeatureCollection whose features have empty properties.
+    """
+    features = data.get("features")
+    if not features:
+        return data
+    return {**data, "features": [{**f, "properties": {}} for f in features]}
+
+
+def _geojson_bounds(data):
+    """
+    Computes the bounds of GeoJSON data in one vectorized shapely call.
+
+    Args:
+        data (dict): The GeoJSON data.
+
+    Returns:
+        list: The bounds as [[south, west], [north, east]], or None if the data
+            has no coordinates. Features without a geometry are skipped.
+    """
+    bounds = _geojson_total_bounds(data)
+    if bounds is None:
+        return None
+    west, south, east, north = bounds
+    return [[south, west], [north, east]]
+
+
+def _feature_index(data):
+    """
+    Builds a spatial index over the features of a large GeoJSON FeatureCollection.
+
+    Args:
+        data (dict): The GeoJSON data.
+
+    Returns:
+        shapely.STRtree: The index of the feature geometries, in feature order, or
+            None if the data has fewer than `_VIEWPORT_FILTER_MIN_FEATURES` features.
+    """
+    features = data.get("features")
+    if not features or len(features) < _VIEWPORT_FILTER_MIN_FEATURES:
+        return None
+
+    import shapely
+
+    return shapely.STRtree(
+        shapely.from_geojson(
+            [
+                None if f.get("geometry") is None else orjson.dumps(f["geometry"])
+                for f in features
+            ]
+        )
+    )
+
+
+def _features_in_view(tree, bounds):
+    """
+    Finds the features whose geometries intersect the map view.
+
+    Args:
+        tree (shapely.STRtree): The index built by `_feature_index`.
+        bounds (tuple): The map bounds as ((south, west), (north, east)).
+
+    Returns:
+        numpy.ndarray: The sorted indices of the features in view, or None if the
+            view is unknown or spans the whole world.
+    """
+    if not bounds:
+        return None
+    (south, west), (north, east) = bounds
+    if east - west >= 360:
+        return None
+
+    import numpy as np
+    import shapely
+
+    # Leaflet longitudes are not wrapped, so also look one world to each side
+    boxes = shapely.box(
+        [west - 360, west, west + 360], south, [east - 360, east, east + 360], north
+    )
+    return np.unique(tree.query(boxes)[1])
+
+
+def _debounce(fn=None, delay=0.2):
+    """
+    Wraps a widget callback so that a burst of events only runs it once.
+
+    Each call restarts a timer, and `fn` runs with the arguments of the last call
+    once no new call has arrived for `delay` seconds. Can be used as `@_debounce`
+    or, to change the delay, as `@_debounce(delay=0.5)`.
+
+    When the caller runs on an event loop, as widget callbacks do in a kernel, the
+    timer is scheduled on that loop so `fn` updates widgets from the loop's thread.
+    A `threading.Timer` is only used when there is no running loop.
+
+    Args:
+        fn (callable, optional): The callback to debounce.
+        delay (float, optional): The quiet period in seconds. Defaults to 0.2.
+
+    Returns:
+        callable: The debounced callback, or a decorator if `fn` is not given.
+    """
+    if fn is None:
+        return functools.partial(_debounce, delay=delay)
+
+    timer = None
+    lock = threading.Lock()
+
+    @functools.wraps(fn)
+    def debounced(*args, **kwargs):
+        nonlocal timer
+        with lock:
+            if timer is not None:
+                timer.cancel()
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                timer = threading.Timer(delay, fn, args, kwargs)
+                timer.start()
+            else:
+                timer = loop.call_later(delay, functools.partial(fn, *args, **kwargs))
+
+    return debounced
+
+
+def _call_soon(loop, fn, *args):
+    """
+    Calls a function on an event loop's thread, or right away if already on it.
+
+    Args:
+        loop (asyncio.AbstractEventLoop): The loop to call `fn` on, or None to call
+            it right away.
+        fn (callable): The function to call.
+        *args: The arguments for `fn`.
+    """
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+    if loop is None or loop is running:
+        fn(*args)
+    else:
+        loop.call_soon_threadsafe(fn, *args)
+
+
+def _when_done(future, callback, loop=None):
+    """
+    Calls a callback with a future once it is done, on the kernel's event loop.
+
+    Widgets are updated from the event loop rather than from the worker thread.
+    Without an event loop there is no UI to keep responsive, so the callback is
+    called right away and waits for the future.
+
+    Args:
+        future (concurrent.futures.Future): The future to wait for.
+        callback (callable): Called with the finished future.
+        loop (asyncio.AbstractEventLoop, optional): The loop to call `callback` on.
+            Defaults to the running loop, if any.
+    """
+    if loop is None:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            callback(future)
+            return
+    future.add_done_callback(functools.partial(loop.call_soon_threadsafe, callback))
+
+
+def _tile_index(lat, lon, zoom):
+    """
+    Returns the XYZ index of the web mercator tile that contains a point.
+
+    Args:
+        lat (float): The latitude of the point.
+        lon (float): The longitude of the point.
+        zoom (int): The zoom level.
+
+    Returns:
+        tuple: The (x, y) tile index.
+    """
+    n = 2**zoom
+    x = int((lon + 180) / 360 * n)
+    y = int((1 - math.asinh(math.tan(math.radians(lat))) / math.pi) / 2 * n)
+    return min(max(x, 0), n - 1), min(max(y, 0), n - 1)
+
+
+def _start_tile_client(source):
+    """
+    Starts a localtileserver tile client for a COG.
+
+    Remote COGs are opened through GDAL's /vsicurl/ driver, which only fetches
+    the byte ranges of the header and of the tiles that are requested.
+
+    Args:
+        source (str): The file path or URL of the COG.
+
+    Returns:
+        localtileserver.TileClient: The tile client.
+    """
+    from localtileserver import TileClient
+
+    if "://" in source:
+        for key, value in _GDAL_REMOTE_DEFAULTS.items():
+            os.environ.setdefault(key, value)
+    if source.startswith(("http://", "https://")):
+        source = f"/vsicurl/{source}"
+    return TileClient(source)
+
+
+def _prefetch_tiles(client, center=False, levels=3, max_tiles=16):
+    """
+    Renders the tiles covering a COG at its default zoom and the levels above it.
+
+    The tiles are thrown away. Rendering them reads the COG's header and
+    overviews into GDAL's block cache, so showing the layer and the first zoom
+    out or pan afterwards do not wait for them. Each tile is rendered once.
+
+    Args:
+        client (localtileserver.TileClient): The tile client of the COG.
+        center (bool, optional): Whether to render the tile at the center of the
+            COG at its default zoom first, to warm up a COG that is not shown yet.
+            The overview pass always skips that tile. Defaults to False.
+        levels (int, optional): The number of zoom levels to render, ending at the
+            default zoom. Defaults to 3.
+        max_tiles (int, optional): The maximum number of tiles to render.
+            Defaults to 16.
+    """
+    zoom = client.default_zoom
+    center_tile = (zoom, *_tile_index(*client.center(), zoom))
+    tiles = [center_tile] if center else []
+
+    south, north, west, east = client.bounds()
+    for z in range(max(zoom - levels + 1, 0), zoom + 1):
+        x_min, y_min = _tile_index(north, west, z)
+        x_max, y_max = _tile_index(south, east, z)
+        tiles.extend(
+            (z, x, y)
+            for x in range(x_min, x_max + 1)
+            for y in range(y_min, y_max + 1)
+            if (z, x, y) != center_tile
+        )
+
+    for z, x, y in tiles[:max_tiles]:
+        try:
+            client.tile(z, x, y)
+        except Exception:
+            logger.debug("Could not prefetch tile %s/%s/%s", z, x, y, exc_info=True)
+
+
+def _shutdown_tile_clients(clients):
+    """
+    Shuts down the tile clients started for a map and drops them.
+
+    localtileserver shares its default server between clients and only stops
+    servers started on their own port. Dropping the clients releases their open
+    rasters. Clients that are still starting are shut down as soon as they are ready.
+
+    Args:
+        clients (dict): The futures of the tile clients, keyed by source. The dict
+            is emptied.
+    """
+
+    def shutdown(future):
+        if not future.cancelled() and future.exception() is None:
+            try:
+                future.result().shutdown()
+            except Exception:
+                logger.debug("Could not shut down a tile client", exc_info=True)
+
+    for future in list(clients.values()):
+        future.add_done_callback(shutdown)
+    clients.clear()
 
 
 class Map(ipyleaflet.Map):
@@ -28,17 +746,238 @@ class Map(ipyleaflet.Map):
         """
         super().__init__(center=center, zoom=zoom, **kwargs)
         self.layout.height = height
+        self._basemap_layer = self.layers[0] if self.layers else None
+        # Basemap tile layers built by the combined UI, keyed by basemap name
+        self._basemap_layers = {}
+        self.title_control = None
+        self._title_position = None
+        self._current_panel = None
+        self._last_fit = None
+        # Overlays currently shown by the combined UI
+        self._ov_image = None
+        self._ov_cog = None
+        self._ov_geojson = None
+        # GeoJSON bounds keyed by source along with the data they were computed from,
+        # and the source the map was last fit to
+        self._geojson_bounds = {}
+        self._geojson_source = None
+        # Token of the latest GeoJSON selection, so slower earlier loads are dropped
+        self._geojson_request = None
+        # Parsed data of the shown GeoJSON layer and the zoom level its geometries
+        # were simplified for
+        self._geojson_raw = None
+        self._geojson_zoom = None
+        # Spatial index and full data of a large GeoJSON layer, and the features
+        # sent for the current view
+        self._geojson_index = None
+        self._geojson_view = None
+        # Observer of the map bounds that refreshes the GeoJSON layer; one per map
+        self._geojson_view_handler = None
+        # Token of the latest COG selection, so that slower earlier clients are dropped
+        self._cog_request = None
+        # Futures of the tile clients started for each COG, keyed by source
+        self._cog_clients = {}
+        self._cog_lock = threading.Lock()
+        # Stop the tile servers when the map is garbage collected or at exit
+        self._cog_finalizer = weakref.finalize(
+            self, _shutdown_tile_clients, self._cog_clients
+        )
+        # Bounds of the started tile clients, dropped along with the clients
+        self._cog_bounds = weakref.WeakKeyDictionary()
+        self._pool = None
+        self._opacity_links = {}
 
-    def add_combined_ui(self, options=None, video_options=None, video_bounds=None, cog_options=None, geojson_options=None, title="Map Title", position="topleft", font_size="16px", font_color="black"):
+    def close(self):
         """
-        Combines all functionalities (image GUI, video overlay, title, COG, GeoJSON, and basemap selector) into one unified UI with a menu.
+        Closes the map and stops the tile servers and worker threads it started.
+        """
+        self._cog_finalizer()
+        self._observe_geojson_view(None)
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+        super().close()
+
+    def _observe_geojson_view(self, handler):
+        """
+        Replaces the observer that refreshes the GeoJSON layer when the map moves.
+
+        Args:
+            handler (callable): The new observer, or None to only remove the old one.
+        """
+        if self._geojson_view_handler is not None:
+            self.unobserve(self._geojson_view_handler, names="bounds")
+        self._geojson_view_handler = handler
+        if handler is not None:
+            self.observe(handler, names="bounds")
+
+    def _executor(self):
+        """
+        Returns the thread pool used for background work, creating it on first use.
+
+        Returns:
+            concurrent.futures.ThreadPoolExecutor: The thread pool.
+        """
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(
+                max_workers=4, thread_name_prefix="salmongis"
+            )
+        return self._pool
+
+    def _cog_client(self, source, prefetch=False):
+        """
+        Returns the tile client for a COG, starting it in the background on first use.
+
+        Args:
+            source (str): The file path or URL of the COG.
+            prefetch (bool, optional): Whether to also prefetch the center tile once
+                the client is started. Defaults to False.
+
+        Returns:
+            concurrent.futures.Future: A future resolving to the tile client.
+        """
+        # Key local files by absolute path so different spellings share a client
+        if "://" not in source:
+            source = os.path.abspath(os.path.expanduser(source))
+
+        # The callback only holds the cache and the pool, not the map, so it cannot
+        # keep the map alive
+        clients, lock, pool = self._cog_clients, self._cog_lock, self._executor()
+
+        def client_started(future):
+            # Let the next request retry instead of caching the failure
+            if future.exception() is not None:
+                with lock:
+                    if clients.get(source) is future:
+                        del clients[source]
+                return
+            # Warm the overviews the user sees first when zooming out
+            try:
+                pool.submit(_prefetch_tiles, future.result(), center=prefetch)
+            except RuntimeError:
+                # The interpreter is exiting and the pool takes no new work
+                pass
+
+        with self._cog_lock:
+            future = self._cog_clients.get(source)
+            if future is None:
+                future = pool.submit(_start_tile_client, source)
+                self._cog_clients[source] = future
+                future.add_done_callback(client_started)
+        return future
+
+    def _link_opacity(self, name, slider, layer):
+        """
+        Links an opacity slider to a layer in the browser, replacing any previous link.
+
+        Slider changes then reach the layer without a round trip through the kernel.
+
+        Args:
+            name (str): The overlay the link belongs to, e.g. "image" or "cog".
+            slider (ipywidgets.FloatSlider): The opacity slider.
+            layer (ipyleaflet.Layer): The layer to link, or None to only remove the
+                old link.
+        """
+        link = self._opacity_links.pop(name, None)
+        if link is not None:
+            link.unlink()
+        if layer is not None:
+            self._opacity_links[name] = widgets.jslink(
+                (slider, "value"), (layer, "opacity")
+            )
+
+    def _maybe_fit(self, bounds, eps=1e-4, min_fraction=0.1):
+        """
+        Fits the map to bounds unless the current view already shows them well.
+
+        The view is kept when it contains the bounds and either was last fit to
+        them or the bounds cover a good part of it.
+
+        Args:
+            bounds (list): The bounds as [[south, west], [north, east]].
+            eps (float, optional): The tolerance in degrees for treating two bounds
+                as the same. Defaults to 1e-4.
+            min_fraction (float, optional): The smallest fraction of the view that
+                contained bounds may cover without refitting. Defaults to 0.1.
+        """
+        last = self._last_fit
+        same = last is not None and all(
+            abs(a - b) < eps
+            for a, b in zip([*last[0], *last[1]], [*bounds[0], *bounds[1]])
+        )
+        if not self.bounds:
+            # The view is unknown until the map is displayed
+            if same:
+                return
+        else:
+            (view_south, view_west), (view_north, view_east) = self.bounds
+            (south, west), (north, east) = bounds
+            if (
+                view_south <= south
+                and view_west <= west
+                and view_north >= north
+                and view_east >= east
+            ):
+                area = (north - south) * (east - west)
+                if same or area >= min_fraction * (view_north - view_south) * (
+                    view_east - view_west
+                ):
+                    self._last_fit = bounds
+                    return
+        self.fit_bounds(bounds)
+        self._last_fit = bounds
+
+    def _geojson_in_view(self):
+        """
+        Restricts the data of the indexed GeoJSON layer to the features in view.
+
+        Returns:
+            tuple: The GeoJSON data to show and a key identifying the selected features.
+        """
+        tree, data = self._geojson_index
+        view = _features_in_view(tree, self.bounds)
+        if view is None:
+            return data, None
+        features = data["features"]
+        return {**data, "features": [features[i] for i in view]}, view.tobytes()
+
+    def _refresh_geojson_view(self):
+        """
+        Sends the features of a large GeoJSON layer that are in the current view.
+
+        Does nothing if the features in view are the ones already shown.
+        """
+        if self._ov_geojson is None or self._geojson_index is None:
+            return
+        data, view = self._geojson_in_view()
+        if view != self._geojson_view:
+            self._ov_geojson.data = data
+            self._geojson_view = view
+
+    def add_combined_ui(
+        self,
+        options=None,
+        video_options=None,
+        video_bounds=None,
+        cog_options=None,
+        geojson_options=None,
+        title="Map Title",
+        position="topleft",
+        font_size="16px",
+        font_color="black",
+        geojson_properties=True,
+    ):
+        """
+        Combines the image GUI, title, COG, GeoJSON and basemap selector into one UI.
+
+        A menu switches between the control panels.
 
         Args:
             options (dict, optional): A dictionary for image options where keys are image names (strings)
                 and values are tuples containing the image URL (str) and bounds (list).
-            video_options (dict, optional): A dictionary for video options where keys are video names (strings)
-                and values are file paths or URLs to the video files.
-            video_bounds (list, optional): The geographical bounds for the video overlay as [[lat_min, lon_min], [lat_max, lon_max]].
+            video_options (dict, optional): Deprecated and ignored, since the UI has
+                no video panel. Will be removed in a future release.
+            video_bounds (list, optional): Deprecated and ignored, like video_options.
             cog_options (dict, optional): A dictionary for COG options where keys are COG names (strings)
                 and values are URLs to the COG files.
             geojson_options (dict, optional): A dictionary for GeoJSON options where keys are GeoJSON names (strings)
@@ -47,20 +986,37 @@ class Map(ipyleaflet.Map):
             position (str, optional): The initial position of the title on the map. Defaults to "topleft".
             font_size (str, optional): The initial font size of the title. Defaults to "16px".
             font_color (str, optional): The initial font color of the title. Defaults to "black".
+            geojson_properties (bool, optional): Whether to send the feature
+                properties of GeoJSON layers to the browser. Set to False for
+                layers that are only drawn, to shrink the data sent. Defaults to True.
 
         Returns:
             None
         """
-        # Default options for images, videos, COGs, and GeoJSON
+        import ipyfilechooser as filechooser
+
+        if video_options is not None or video_bounds is not None:
+            warnings.warn(
+                "video_options and video_bounds are ignored and will be removed",
+                DeprecationWarning,
+                stacklevel=2,
+            )
+
+        # The kernel's event loop, which widget updates from other threads are sent to
+        try:
+            ui_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            ui_loop = None
+
+        # Only warm up COGs and GeoJSON the caller asked for, not the defaults
+        prewarm_cogs = bool(cog_options)
+        preload_geojson = bool(geojson_options)
+
+        # Default options for images, COGs, and GeoJSON
         options = options or {
             "Sample Image 1": ("https://example.com/sample1.png", [[-90, -180], [90, 180]]),
             "Sample Image 2": ("https://example.com/sample2.png", [[10, -50], [20, 50]]),
         }
-        video_options = video_options or {
-            "Sample Video 1": "https://example.com/sample_video1.mp4",
-            "Sample Video 2": "https://example.com/sample_video2.mp4",
-        }
-        video_bounds = video_bounds or [[-10, -20], [10, 20]]
         cog_options = cog_options or {
             "Select a COG": None,
             "COG 1": "https://example.com/cog1.tif",
@@ -72,307 +1028,701 @@ class Map(ipyleaflet.Map):
             "World Cities": "https://github.com/opengeos/datasets/releases/download/world/world_cities.geojson",
         }
 
-        # Widgets for image selection
-        image_chooser = filechooser.FileChooser()
-        image_chooser.title = "Select an image file"
-        image_chooser.filter_pattern = ["*.png", "*.jpg", "*.jpeg"]  # Restrict file types
-        image_chooser.use_dir_icons = True
-
-        # Sliders for image bounds and opacity
-        lat_min_slider = widgets.FloatSlider(value=0, min=-90, max=90, step=0.1, description="Lat Min:")
-        lon_min_slider = widgets.FloatSlider(value=0, min=-180, max=180, step=0.1, description="Lon Min:")
-        lat_max_slider = widgets.FloatSlider(value=0, min=-90, max=90, step=0.1, description="Lat Max:")
-        lon_max_slider = widgets.FloatSlider(value=0, min=-180, max=180, step=0.1, description="Lon Max:")
-        image_opacity_slider = widgets.FloatSlider(value=0.8, min=0, max=1, step=0.1, description="Opacity:")
-        image_sliders = widgets.VBox([lat_min_slider, lon_min_slider, lat_max_slider, lon_max_slider, image_opacity_slider])
-
-        # Widgets for video overlay
-        video_dropdown = widgets.Dropdown(
-            options=["Select a video"] + list(video_options.keys()),
-            value="Select a video",
-            description="Video:",
-        )
-        video_opacity_slider = widgets.FloatSlider(value=0.7, min=0, max=1, step=0.1, description="Opacity:")
-
-        # Widgets for COG selection
-        cog_chooser = filechooser.FileChooser()
-        cog_chooser.title = "Select a COG file"
-        cog_chooser.filter_pattern = ["*.tif", "*.tiff"]  # Restrict file types to TIFF
-        cog_chooser.use_dir_icons = True
-
-        cog_opacity_slider = widgets.FloatSlider(value=0.8, min=0, max=1, step=0.1, description="Opacity:")
-
-        # Function to add or update the COG layer
-        def add_cog_layer(change):
+        # Control panels are only built the first time they are opened from the menu
+        def build_image_panel():
             """
-            Adds or updates the COG layer on the map based on the selected file and opacity.
-
-            Args:
-                change: The change event triggered by the FileChooser or opacity slider.
+            Builds the image control panel and wires up its callbacks.
 
             Returns:
-                None
+                ipyleaflet.WidgetControl: The control holding the panel.
             """
-            selected_file = cog_chooser.selected
-            if not selected_file:
-                # Remove the current COG layer if no file is selected
-                if current_overlay["cog"]:
-                    self.remove(current_overlay["cog"])
-                    current_overlay["cog"] = None
-            else:
-                # Remove the existing COG layer if it exists
-                if current_overlay["cog"]:
-                    self.remove(current_overlay["cog"])
-                try:
-                    # Add the new COG layer
-                    client = TileClient(selected_file)
-                    cog_layer = get_leaflet_tile_layer(client, opacity=cog_opacity_slider.value)
-                    self.add(cog_layer)
-                    current_overlay["cog"] = cog_layer
-
-                    # Zoom to the bounds of the COG layer
-                    self.fit_bounds(client.bounds)
-                except Exception as e:
-                    print(f"Error adding COG layer: {e}")
-
-        # Observe changes in the FileChooser
-        cog_chooser.register_callback(add_cog_layer)
-
-        # Observe changes in the opacity slider
-        cog_opacity_slider.observe(add_cog_layer, names="value")
-
-        # Create the COG control panel
-        cog_control_panel = widgets.VBox([cog_chooser, cog_opacity_slider])
-        cog_control = ipyleaflet.WidgetControl(widget=cog_control_panel, position="topright")
-
-        # Widgets for GeoJSON selection
-        geojson_chooser = filechooser.FileChooser()
-        geojson_chooser.title = "Select a GeoJSON file"
-        geojson_chooser.filter_pattern = ["*.geojson", "*.json"]  # Restrict file types to GeoJSON/JSON
-        geojson_chooser.use_dir_icons = True
-
-        # Function to add or update the GeoJSON layer
-        def update_geojson(change):
-            """
-            Adds or updates the GeoJSON layer on the map based on the selected file.
+            # Widgets for image selection
+            image_chooser = filechooser.FileChooser()
+            image_chooser.title = "Select an image file"
+            # Restrict file types
+            image_chooser.filter_pattern = ["*.png", "*.jpg", "*.jpeg"]
+            image_chooser.use_dir_icons = True
+
+            # Sliders for image bounds and opacity
+            lat_min_slider = widgets.FloatSlider(
+                value=0,
+                min=-90,
+                max=90,
+                step=0.1,
+                description="Lat Min:",
+                continuous_update=False,
+            )
+            lon_min_slider = widgets.FloatSlider(
+                value=0,
+                min=-180,
+                max=180,
+                step=0.1,
+                description="Lon Min:",
+                continuous_update=False,
+            )
+            lat_max_slider = widgets.FloatSlider(
+                value=0,
+                min=-90,
+                max=90,
+                step=0.1,
+                description="Lat Max:",
+                continuous_update=False,
+            )
+            lon_max_slider = widgets.FloatSlider(
+                value=0,
+                min=-180,
+                max=180,
+                step=0.1,
+                description="Lon Max:",
+                continuous_update=False,
+            )
+            image_opacity_slider = widgets.FloatSlider(
+                value=0.8, min=0, max=1, step=0.1, description="Opacity:"
+            )
+            image_sliders = widgets.VBox(
+                [
+                    lat_min_slider,
+                    lon_min_slider,
+                    lat_max_slider,
+                    lon_max_slider,
+                    image_opacity_slider,
+                ]
+            )
 
-            Args:
-                change: The change event triggered by the FileChooser.
+            # Functions for updating the map
+            def update_image(change):
+                """
+                Updates the image overlay based on the selected file and bounds.
+
+                Args:
+                    change: The change event triggered by the FileChooser.
+
+                Returns:
+                    None
+                """
+                selected_file = image_chooser.selected
+
+                # Send the removal of the old overlay and the new one as one update
+                with self.hold_sync():
+                    # Remove the existing image overlay if it exists
+                    if self._ov_image:
+                        self.remove(self._ov_image)
+                        self._ov_image = None
+                        self._link_opacity("image", image_opacity_slider, None)
+                    if not selected_file:
+                        return
+
+                    # Use bounds from sliders
+                    bounds = [
+                        [lat_min_slider.value, lon_min_slider.value],
+                        [lat_max_slider.value, lon_max_slider.value],
+                    ]
+                    try:
+                        # Add the new image overlay
+                        overlay = ipyleaflet.ImageOverlay(
+                            url=selected_file,
+                            bounds=bounds,
+                            opacity=image_opacity_slider.value,
+                        )
+                        self.add(overlay)
+                        self._ov_image = overlay
+                        self._link_opacity("image", image_opacity_slider, overlay)
+                    except Exception:
+                        logger.exception("Error adding image overlay")
+
+            # Observe changes in the FileChooser
+            image_chooser.register_callback(update_image)
+
+            @_debounce
+            def update_image_bounds(change):
+                """
+                Updates the bounds of the image overlay dynamically.
+
+                Args:
+                    change: The change event triggered by the sliders.
+
+                Returns:
+                    None
+                """
+                overlay = self._ov_image
+                if overlay is None:
+                    return
 
-            Returns:
-                None
+                new_bounds = [
+                    [lat_min_slider.value, lon_min_slider.value],
+                    [lat_max_slider.value, lon_max_slider.value],
+                ]
+                # Skip the write, and its message to the browser, if nothing moved
+                if new_bounds != overlay.bounds:
+                    with overlay.hold_trait_notifications():
+                        overlay.bounds = new_bounds
+
+            # Observe changes in widgets
+            lat_min_slider.observe(update_image_bounds, names="value")
+            lon_min_slider.observe(update_image_bounds, names="value")
+            lat_max_slider.observe(update_image_bounds, names="value")
+            lon_max_slider.observe(update_image_bounds, names="value")
+
+            # Create the image control panel
+            image_control_panel = widgets.VBox([image_chooser, image_sliders])
+            image_control = ipyleaflet.WidgetControl(
+                widget=image_control_panel, position="topright"
+            )
+            return image_control
+
+        def build_cog_panel():
             """
-            selected_file = geojson_chooser.selected
-            if not selected_file:
-                # Remove the current GeoJSON layer if no file is selected
-                if current_overlay["geojson"]:
-                    self.remove_layer(current_overlay["geojson"])
-                    current_overlay["geojson"] = None
-            else:
-                # Remove the existing GeoJSON layer if it exists
-                if current_overlay["geojson"]:
-                    self.remove_layer(current_overlay["geojson"])
-                try:
-                    # Load the GeoJSON data from the selected file
-                    with open(selected_file, "r") as f:
-                        geojson_data = f.read()
-                    geojson_layer = GeoJSON(data=json.loads(geojson_data))  # Ensure data is parsed as JSON
-                    self.add_layer(geojson_layer)
-                    current_overlay["geojson"] = geojson_layer
-
-                    # Zoom to the bounds of the GeoJSON layer
-                    if hasattr(geojson_layer, "bounds"):
-                        self.fit_bounds(geojson_layer.bounds)
-                    else:
-                        print("GeoJSON layer does not have bounds.")
-                except Exception as e:
-                    print(f"Error loading GeoJSON: {e}")
+            Builds the COG control panel and wires up its callbacks.
 
-        # Observe changes in the FileChooser
-        geojson_chooser.register_callback(update_geojson)
+            Returns:
+                ipyleaflet.WidgetControl: The control holding the panel.
+            """
+            # Widgets for COG selection
+            cog_chooser = filechooser.FileChooser()
+            cog_chooser.title = "Select a COG file"
+            # Restrict file types to TIFF
+            cog_chooser.filter_pattern = ["*.tif", "*.tiff"]
+            cog_chooser.use_dir_icons = True
+
+            # Dropdown for the preset COG URLs
+            cog_dropdown = widgets.Dropdown(
+                options=list(cog_options),
+                value=None,
+                description="COG:",
+            )
 
-        # Create the GeoJSON control panel
-        geojson_control_panel = widgets.VBox([geojson_chooser])
-        geojson_control = ipyleaflet.WidgetControl(widget=geojson_control_panel, position="topright")
+            cog_opacity_slider = widgets.FloatSlider(
+                value=0.8, min=0, max=1, step=0.1, description="Opacity:"
+            )
 
+            def apply_cog(source, request, future):
+                """
+                Replaces the COG layer with a started tile client.
+
+                Nothing happens if a newer selection was made meanwhile.
+
+                Args:
+                    source (str): The file path or URL of the COG.
+                    request (object): The token of the selection that started it.
+                    future (concurrent.futures.Future): The future of the tile client.
+
+                Returns:
+                    None
+                """
+                if request is not self._cog_request:
+                    return
+
+                # Send the removal of the old layer and the new one as one update
+                with self.hold_sync():
+                    remove_cog()
+                    try:
+                        from localtileserver import get_leaflet_tile_layer
+
+                        client = future.result()
+                        cog_layer = get_leaflet_tile_layer(
+                            client, opacity=cog_opacity_slider.value
+                        )
+                        self.add(cog_layer)
+                        self._ov_cog = cog_layer
+                        self._link_opacity("cog", cog_opacity_slider, cog_layer)
+
+                        # Zoom to the COG's bounds, computed once per tile client
+                        if client not in self._cog_bounds:
+                            self._cog_bounds[client] = client.bounds()
+                        south, north, west, east = self._cog_bounds[client]
+                        self._maybe_fit([[south, west], [north, east]])
+                    except Exception:
+                        logger.exception("Error adding COG layer")
+
+            def remove_cog():
+                """
+                Removes the COG layer from the map if it exists.
+
+                Returns:
+                    None
+                """
+                if self._ov_cog:
+                    self.remove(self._ov_cog)
+                    self._ov_cog = None
+                    self._link_opacity("cog", cog_opacity_slider, None)
+
+            # Function to add or update the COG layer
+            def show_cog(source):
+                """
+                Replaces the COG layer on the map with the COG at a file path or URL.
+
+                Tile servers are cached per source and started on the map's thread pool,
+                so the kernel stays responsive while a new server starts. The previous
+                layer stays on the map until the new one is ready.
+
+                Args:
+                    source (str): The file path or URL of the COG. If empty, the
+                        current COG layer is only removed.
+
+                Returns:
+                    None
+                """
+                # Each selection supersedes tile clients that are still starting
+                request = self._cog_request = object()
+                if not source:
+                    remove_cog()
+                    return
+
+                _when_done(
+                    self._cog_client(source),
+                    functools.partial(apply_cog, source, request),
+                )
+
+            def add_cog_layer(change):
+                """
+                Shows the COG file selected in the FileChooser.
+
+                Args:
+                    change: The change event triggered by the FileChooser.
+
+                Returns:
+                    None
+                """
+                show_cog(cog_chooser.selected)
+
+            def select_cog(change):
+                """
+                Shows the preset COG selected in the dropdown.
+
+                Args:
+                    change: The change event triggered by the dropdown.
+
+                Returns:
+                    None
+                """
+                show_cog(cog_options.get(change["new"]))
+
+            # Observe changes in the FileChooser and the dropdown
+            cog_chooser.register_callback(add_cog_layer)
+            cog_dropdown.observe(select_cog, names="value")
+
+            # Create the COG control panel
+            cog_control_panel = widgets.VBox(
+                [cog_dropdown, cog_chooser, cog_opacity_slider]
+            )
+            cog_control = ipyleaflet.WidgetControl(
+                widget=cog_control_panel, position="topright"
+            )
+            return cog_control
+
+        # Start the tile servers for the preset COGs in the background
+        if prewarm_cogs:
+            for source in cog_options.values():
+                if source:
+                    self._cog_client(source, prefetch=True)
+
+        # Load the preset GeoJSON sources in the background, while the user picks one
+        geojson_preloads = {}
+        if preload_geojson:
+            for source in geojson_options.values():
+                if source:
+                    geojson_preloads[source] = self._executor().submit(
+                        _load_geojson, source
+                    )
 
+        def build_geojson_panel():
+            """
+            Builds the GeoJSON control panel and wires up its callbacks.
 
-        # Widgets for title
-        title_input = widgets.Text(value=title, description="Title:")
-        font_size_slider = widgets.IntSlider(value=int(font_size[:-2]), min=10, max=50, step=1, description="Font Size:")
-        font_color_picker = widgets.ColorPicker(value=font_color, description="Font Color:")
-        position_dropdown = widgets.Dropdown(
-            options=["topcenter", "topright", "topleft", "bottomright", "bottomleft"],
-            value=position,
-            description="Position:",
-        )
+            Returns:
+                ipyleaflet.WidgetControl: The control holding the panel.
+            """
+            # Widgets for GeoJSON selection
+            geojson_chooser = filechooser.FileChooser()
+            geojson_chooser.title = "Select a GeoJSON file"
+            # Restrict file types to GeoJSON and newline-delimited GeoJSON
+            geojson_chooser.filter_pattern = ["*.geojson", "*.json"] + [
+                f"*{suffix}" for suffix in _GEOJSON_SEQ_SUFFIXES
+            ]
+            geojson_chooser.use_dir_icons = True
+
+            # Dropdown for the preset GeoJSON URLs
+            geojson_dropdown = widgets.Dropdown(
+                options=list(geojson_options),
+                value=None,
+                description="GeoJSON:",
+            )
 
-        # Title control panel
-        title_control_panel = widgets.VBox([title_input, font_size_slider, font_color_picker, position_dropdown])
-        title_control_panel_control = ipyleaflet.WidgetControl(widget=title_control_panel, position="bottomright")
+            def remove_geojson():
+                """
+                Removes the GeoJSON layer from the map if it exists.
+
+                Returns:
+                    None
+                """
+                if self._ov_geojson:
+                    self.remove_layer(self._ov_geojson)
+                    self._ov_geojson = None
+                    self._geojson_index = None
+                    self._geojson_raw = None
+
+            def load_geojson(source, zoom):
+                """
+                Loads, simplifies and indexes GeoJSON data. Runs on the thread pool.
+
+                Args:
+                    source (str): The file path or URL of the GeoJSON data.
+                    zoom (float): The zoom level to simplify the geometries for.
+
+                Returns:
+                    tuple: The result of prepare_geojson.
+                """
+                # Wait for a preload of the source rather than loading it a second time
+                preload = geojson_preloads.pop(source, None)
+                if preload is not None and preload.exception() is None:
+                    raw_data = preload.result()
+                else:
+                    raw_data = _load_geojson(source)
+                return prepare_geojson(raw_data, zoom)
+
+            def prepare_geojson(raw_data, zoom):
+                """
+                Simplifies and indexes GeoJSON data for a zoom level.
+
+                Runs on the map's thread pool.
+
+                Args:
+                    raw_data (dict): The parsed GeoJSON data.
+                    zoom (float): The zoom level to simplify the geometries for.
+
+                Returns:
+                    tuple: The parsed data, the simplified data, its spatial index
+                        (None for small layers) and the whole zoom level it was
+                        simplified for (None if simplification left it unchanged).
+                """
+                level = round(zoom)
+                geojson_data = _simplify_geojson(raw_data, _simplify_tolerance(level))
+                if geojson_data is raw_data:
+                    level = None
+                if not geojson_properties:
+                    geojson_data = _drop_properties(geojson_data)
+                return raw_data, geojson_data, _feature_index(geojson_data), level
+
+            def apply_geojson(source, request, future):
+                """
+                Shows loaded GeoJSON data, unless a newer selection was made meanwhile.
+
+                The map keeps a single GeoJSON layer and swaps its data, so the layer is
+                re-rendered in place instead of being removed and added again.
+
+                Args:
+                    source (str): The file path or URL of the GeoJSON data.
+                    request (object): The token of the selection that started the load.
+                    future (concurrent.futures.Future): The finished load.
+
+                Returns:
+                    None
+                """
+                if request is not self._geojson_request:
+                    return
 
-        # Function to update the title
-        def update_title(change):
-            """
-            Updates the title widget on the map based on user input.
+                try:
+                    raw_data, geojson_data, tree, self._geojson_zoom = future.result()
+                    self._geojson_raw = raw_data
 
-            Args:
-                change: The change event triggered by the widgets.
+                    # Large layers only send the features in view
+                    if tree is not None:
+                        self._geojson_index = (tree, geojson_data)
+                        layer_data, self._geojson_view = self._geojson_in_view()
+                    else:
+                        self._geojson_index = None
+                        layer_data = geojson_data
 
-            Returns:
-                None
-            """
-            title_widget.value = (
-                f"<div style='color:{font_color_picker.value}; font-size:{font_size_slider.value}px; text-align:center;'>"
-                f"{title_input.value}</div>"
+                    if self._ov_geojson is None:
+                        self._ov_geojson = GeoJSON(data=layer_data)
+                        self.add_layer(self._ov_geojson)
+                    else:
+                        self._ov_geojson.data = layer_data
+
+                    # Zoom to the layer's bounds when a different source is shown
+                    if source != self._geojson_source:
+                        # The parsed data is reused while the source is unchanged,
+                        # so its identity versions the bounds
+                        cached = self._geojson_bounds.get(source)
+                        if cached is None or cached[0] is not raw_data:
+                            cached = self._geojson_bounds[source] = (
+                                raw_data,
+                                _geojson_bounds(geojson_data),
+                            )
+                        if cached[1]:
+                            self._maybe_fit(cached[1])
+                        self._geojson_source = source
+                except Exception:
+                    # Do not leave the previous data on the map under the new selection
+                    remove_geojson()
+                    logger.exception("Error loading GeoJSON")
+
+            # Function to add or update the GeoJSON layer
+            def show_geojson(source):
+                """
+                Shows the GeoJSON data from a local file or URL on the map.
+
+                The data is downloaded, parsed and simplified on the map's thread pool,
+                so the kernel stays responsive while a large file loads.
+
+                Args:
+                    source (str): The file path or URL of the GeoJSON data. If empty,
+                        the current GeoJSON layer is only removed.
+
+                Returns:
+                    None
+                """
+                # Each selection supersedes loads that are still running
+                request = self._geojson_request = object()
+                # The shown layer is not simplified again while another source loads
+                self._geojson_zoom = None
+                if not source:
+                    remove_geojson()
+                    return
+
+                future = self._executor().submit(load_geojson, source, self.zoom)
+                _when_done(future, functools.partial(apply_geojson, source, request))
+
+            def update_geojson(change):
+                """
+                Shows the GeoJSON file selected in the FileChooser.
+
+                Args:
+                    change: The change event triggered by the FileChooser.
+
+                Returns:
+                    None
+                """
+                show_geojson(geojson_chooser.selected)
+
+            def select_geojson(change):
+                """
+                Shows the preset GeoJSON selected in the dropdown.
+
+                Args:
+                    change: The change event triggered by the dropdown.
+
+                Returns:
+                    None
+                """
+                show_geojson(geojson_options.get(change["new"]))
+
+            # Observe changes in the FileChooser and the dropdown
+            geojson_chooser.register_callback(update_geojson)
+            geojson_dropdown.observe(select_geojson, names="value")
+
+            def refresh_geojson_layer():
+                """
+                Updates the GeoJSON layer for the current view.
+
+                Runs on the UI's event loop.
+
+                The geometries are simplified again on the map's thread pool when the
+                whole zoom level changes; otherwise only the features in view of a
+                large layer are updated.
+
+                Returns:
+                    None
+                """
+                if self._ov_geojson is None:
+                    return
+                zoom = self._geojson_zoom
+                if zoom is not None and round(self.zoom) != zoom:
+                    request = self._geojson_request = object()
+                    future = self._executor().submit(
+                        prepare_geojson, self._geojson_raw, self.zoom
+                    )
+                    apply = functools.partial(
+                        apply_geojson, self._geojson_source, request
+                    )
+                    _when_done(future, apply, ui_loop)
+                    return
+                self._refresh_geojson_view()
+
+            @_debounce(delay=0.3)
+            def update_geojson_view(change):
+                """
+                Updates the GeoJSON layer after the map is panned or zoomed.
+
+                Args:
+                    change: The change event triggered by the map bounds.
+
+                Returns:
+                    None
+                """
+                # The layer and its request token are only touched on the UI's loop
+                _call_soon(ui_loop, refresh_geojson_layer)
+
+            # A later add_combined_ui call replaces this observer instead of adding one
+            self._observe_geojson_view(update_geojson_view)
+
+            # Create the GeoJSON control panel
+            geojson_control_panel = widgets.VBox([geojson_dropdown, geojson_chooser])
+            geojson_control = ipyleaflet.WidgetControl(
+                widget=geojson_control_panel, position="topright"
             )
-            if self.title_control in self.controls:
-                self.remove_control(self.title_control)
-            self.title_control = ipyleaflet.WidgetControl(widget=title_widget, position=position_dropdown.value)
-            self.add_control(self.title_control)
+            return geojson_control
 
         # Initialize the title widget
         title_widget = widgets.HTML(
-            value=f"<div style='color:{font_color}; font-size:{font_size}; text-align:center; background-color: transparent;'>{title}</div>"
+            value=_TITLE_TEMPLATE.format(
+                color=font_color, size=int(font_size[:-2]), text=html.escape(title)
+            )
         )
+        if self.title_control in self.controls:
+            self.remove_control(self.title_control)
         self.title_control = ipyleaflet.WidgetControl(widget=title_widget, position=position)
         self.add_control(self.title_control)
+        self._title_position = position
 
-        # Observe changes in title widgets
-        title_input.observe(update_title, names="value")
-        font_size_slider.observe(update_title, names="value")
-        font_color_picker.observe(update_title, names="value")
-        position_dropdown.observe(update_title, names="value")
-
-        # Dictionary to keep track of overlays
-        current_overlay = {"image": None, "cog": None, "geojson": None}
-
-        # Functions for updating the map
-        def update_image(change):
+        def build_title_panel():
             """
-            Updates the image overlay on the map based on the selected file and bounds.
-
-            Args:
-                change: The change event triggered by the FileChooser.
+            Builds the title control panel and wires up its callbacks.
 
             Returns:
-                None
+                ipyleaflet.WidgetControl: The control holding the panel.
             """
-            selected_file = image_chooser.selected
-            if not selected_file:
-                # Remove the current image overlay if no file is selected
-                if current_overlay["image"]:
-                    self.remove(current_overlay["image"])
-                    current_overlay["image"] = None
-            else:
-                # Remove the existing image overlay if it exists
-                if current_overlay["image"]:
-                    self.remove(current_overlay["image"])
-
-                # Use bounds from sliders
-                bounds = [
-                    [lat_min_slider.value, lon_min_slider.value],
-                    [lat_max_slider.value, lon_max_slider.value],
-                ]
-                try:
-                    # Add the new image overlay
-                    overlay = ipyleaflet.ImageOverlay(
-                        url=selected_file,
-                        bounds=bounds,
-                        opacity=image_opacity_slider.value,
-                    )
-                    self.add(overlay)
-                    current_overlay["image"] = overlay
-                except Exception as e:
-                    print(f"Error adding image overlay: {e}")
+            # Widgets for title
+            title_input = widgets.Text(
+                value=title, description="Title:", continuous_update=False
+            )
+            font_size_slider = widgets.IntSlider(
+                value=int(font_size[:-2]),
+                min=10,
+                max=50,
+                step=1,
+                description="Font Size:",
+                continuous_update=False,
+            )
+            font_color_picker = widgets.ColorPicker(
+                value=font_color, description="Font Color:"
+            )
+            position_dropdown = widgets.Dropdown(
+                options=[
+                    "topcenter",
+                    "topright",
+                    "topleft",
+                    "bottomright",
+                    "bottomleft",
+                ],
+                value=position,
+                description="Position:",
+            )
 
-        # Observe changes in the FileChooser
-        image_chooser.register_callback(update_image)
+            # Title control panel
+            title_control_panel = widgets.VBox(
+                [title_input, font_size_slider, font_color_picker, position_dropdown]
+            )
+            title_control_panel_control = ipyleaflet.WidgetControl(
+                widget=title_control_panel, position="bottomright"
+            )
 
-        def update_image_bounds(change):
+            # Function to update the title text and style
+            @_debounce
+            def update_title(change):
+                """
+                Updates the title text and style in place, keeping the existing control.
+
+                Args:
+                    change: The change event triggered by the widgets.
+
+                Returns:
+                    None
+                """
+                title_widget.value = _TITLE_TEMPLATE.format(
+                    color=font_color_picker.value,
+                    size=font_size_slider.value,
+                    text=html.escape(title_input.value),
+                )
+
+            # Function to move the title
+            def update_title_position(change):
+                """
+                Moves the title control to the selected position.
+
+                Args:
+                    change: The change event triggered by the position dropdown.
+
+                Returns:
+                    None
+                """
+                position = position_dropdown.value
+                if position == self._title_position:
+                    return
+                # Send the removal and the re-add to the browser as one update
+                with self.hold_sync():
+                    if self.title_control in self.controls:
+                        self.remove_control(self.title_control)
+                    self.title_control = ipyleaflet.WidgetControl(
+                        widget=title_widget, position=position
+                    )
+                    self.add_control(self.title_control)
+                self._title_position = position
+
+            # Observe changes in title widgets
+            title_input.observe(update_title, names="value")
+            font_size_slider.observe(update_title, names="value")
+            font_color_picker.observe(update_title, names="value")
+            position_dropdown.observe(update_title_position, names="value")
+            return title_control_panel_control
+
+        # The basemap menu is built the first time it is opened
+        def build_basemap_menu():
             """
-            Updates the bounds of the image overlay dynamically.
-
-            Args:
-                change: The change event triggered by the sliders.
+            Builds the basemap dropdown and apply button and wires up the button.
 
             Returns:
-                None
+                ipywidgets.VBox: The basemap menu.
             """
-            if current_overlay["image"]:
-                new_bounds = [
-                    [lat_min_slider.value, lon_min_slider.value],
-                    [lat_max_slider.value, lon_max_slider.value],
-                ]
-                current_overlay["image"].bounds = new_bounds
-
-        # Observe changes in widgets
-        lat_min_slider.observe(update_image_bounds, names="value")
-        lon_min_slider.observe(update_image_bounds, names="value")
-        lat_max_slider.observe(update_image_bounds, names="value")
-        lon_max_slider.observe(update_image_bounds, names="value")
-
-        # Create control panels
-        image_control_panel = widgets.VBox([image_chooser, image_sliders])
-        video_control_panel = widgets.VBox([video_dropdown, video_opacity_slider])
-        cog_control_panel = widgets.VBox([cog_chooser, cog_opacity_slider])
-        geojson_control_panel = widgets.VBox([geojson_chooser])
-        title_control_panel = widgets.VBox([title_input, font_size_slider, font_color_picker, position_dropdown])
-
-        # Create WidgetControl objects
-        image_control = ipyleaflet.WidgetControl(widget=image_control_panel, position="topright")
-        cog_control = ipyleaflet.WidgetControl(widget=cog_control_panel, position="topright")
-        geojson_control = ipyleaflet.WidgetControl(widget=geojson_control_panel, position="topright")
-        title_control_panel_control = ipyleaflet.WidgetControl(widget=title_control_panel, position="bottomright")
-
-        # Add a dropdown and button to change the basemap
-        basemap_dropdown = widgets.Dropdown(
-            options=[
-                "OpenStreetMap.Mapnik",
-                "OpenTopoMap",
-                "CartoDB.Positron",
-                "CartoDB.DarkMatter",
-            ],
-            value="OpenStreetMap.Mapnik",
-            description="Basemap:",
-            layout=widgets.Layout(width="200px"),
-        )
+            basemap_dropdown = widgets.Dropdown(
+                options=list(_BASEMAPS),
+                value="OpenStreetMap.Mapnik",
+                description="Basemap:",
+                layout=widgets.Layout(width="200px"),
+            )
 
-        apply_basemap_button = widgets.Button(
-            description="Apply",
-            button_style="success",
-            tooltip="Apply the selected basemap",
-            icon="map",
-            layout=widgets.Layout(width="80px"),
-        )
+            apply_basemap_button = widgets.Button(
+                description="Apply",
+                button_style="success",
+                tooltip="Apply the selected basemap",
+                icon="map",
+                layout=widgets.Layout(width="80px"),
+            )
 
-        # Function to update the basemap
-        def update_basemap(b):
-            """
-            Updates the basemap on the map based on the selected option.
+            # Function to update the basemap
+            def update_basemap(b):
+                """
+                Updates the basemap on the map based on the selected option.
 
-            Args:
-                b: The button click event.
+                Args:
+                    b: The button click event.
 
-            Returns:
-                None
-            """
-            # Remove all existing tile layers
-            for layer in self.layers:
-                if isinstance(layer, ipyleaflet.TileLayer):
-                    self.remove_layer(layer)
-
-            # Add the selected basemap
-            basemap_name = basemap_dropdown.value
-            try:
-                basemap = eval(f"ipyleaflet.basemaps.{basemap_name}")
-                tile_layer = ipyleaflet.TileLayer(url=basemap.build_url(), name=basemap_name)
-                self.add_layer(tile_layer)
-            except Exception as e:
-                print(f"Error updating basemap: {e}")
+                Returns:
+                    None
+                """
+                # Swap the current basemap for the selected one, leaving overlays alone
+                basemap_name = basemap_dropdown.value
+                try:
+                    # Each basemap's tile layer is built once and reused later
+                    tile_layer = self._basemap_layers.get(basemap_name)
+                    if tile_layer is None:
+                        tile_layer = self._basemap_layers[basemap_name] = (
+                            ipyleaflet.basemap_to_tiles(_BASEMAPS[basemap_name])
+                        )
+                    if tile_layer is self._basemap_layer and tile_layer in self.layers:
+                        return
+                    if self._basemap_layer in self.layers:
+                        self.substitute(self._basemap_layer, tile_layer)
+                    else:
+                        # Keep the basemap beneath any overlays
+                        self.layers = (tile_layer,) + self.layers
+                    self._basemap_layer = tile_layer
+                except Exception:
+                    logger.exception("Error updating basemap")
 
-        # Attach the update function to the button
-        apply_basemap_button.on_click(update_basemap)
+            # Attach the update function to the button
+            apply_basemap_button.on_click(update_basemap)
+            return widgets.VBox([basemap_dropdown, apply_basemap_button])
 
         # Create a button to toggle the basemap functionality
         basemap_button = widgets.Button(
@@ -383,9 +1733,8 @@ class Map(ipyleaflet.Map):
             layout=widgets.Layout(width="100px", height="30px"),
         )
 
-        # Create a container for the basemap dropdown and apply button
-        basemap_menu = widgets.VBox([basemap_dropdown, apply_basemap_button])
-        basemap_menu.layout.display = "none"  # Initially hidden
+        # Create a container for the basemap button, which the menu joins once built
+        basemap_control = widgets.VBox([basemap_button])
 
         # Function to toggle the visibility of the basemap menu
         def toggle_basemap_menu(b):
@@ -398,6 +1747,12 @@ class Map(ipyleaflet.Map):
             Returns:
                 None
             """
+            if len(basemap_control.children) == 1:
+                basemap_control.children = (basemap_button, build_basemap_menu())
+                basemap_button.icon = "eye-slash"
+                return
+
+            basemap_menu = basemap_control.children[1]
             if basemap_menu.layout.display == "none":
                 basemap_menu.layout.display = "flex"
                 basemap_button.icon = "eye-slash"
@@ -408,16 +1763,46 @@ class Map(ipyleaflet.Map):
         # Attach the toggle function to the basemap button
         basemap_button.on_click(toggle_basemap_menu)
 
-        # Create a container for the basemap button and menu
-        basemap_control = widgets.VBox([basemap_button, basemap_menu])
-
         # Add the basemap control to the map
         self.add_control(ipyleaflet.WidgetControl(widget=basemap_control, position="topright"))
 
+        # Control panels opened from the menu, keyed by their button and built on demand
+        panel_builders = {
+            "Title": build_title_panel,
+            "Image": build_image_panel,
+            "COG": build_cog_panel,
+            "JSON": build_geojson_panel,
+        }
+        panel_controls = {}
+        managed_controls = set()
+
+        def show_panel(control):
+            """
+            Closes the open control panels and opens the given one in a single update.
+
+            Args:
+                control (ipyleaflet.WidgetControl): The panel to open, or None to
+                    only close the current one.
+
+            Returns:
+                None
+            """
+            # Nothing to do if the panel is already the one shown
+            if control is self._current_panel and (
+                control is None or control in self.controls
+            ):
+                return
+            controls = tuple(c for c in self.controls if c not in managed_controls)
+            if control is not None:
+                controls += (control,)
+            if controls != self.controls:
+                self.controls = controls
+            self._current_panel = control
+
         # Define the toggle_controls function
         def toggle_controls(change):
             """
-            Toggles the visibility of the control panels based on the selected toggle button.
+            Shows the control panel selected in the menu, closing the previous one.
 
             Args:
                 change: The change event triggered by the toggle buttons.
@@ -425,41 +1810,34 @@ class Map(ipyleaflet.Map):
             Returns:
                 None
             """
-            # Remove all active controls
-            for control in [image_control, cog_control, title_control_panel_control, geojson_control]:
-                if control in self.controls:
-                    self.remove_control(control)
-
-            # Add the corresponding control based on the button pressed
-            if change["owner"].description == "Title" and change["new"]:
-                self.add_control(title_control_panel_control)
-            elif change["owner"].description == "Image" and change["new"]:
-                self.add_control(image_control)
-            elif change["owner"].description == "COG" and change["new"]:
-                self.add_control(cog_control)
-            elif change["owner"].description == "JSON" and change["new"]:
-                self.add_control(geojson_control)
-
-        # Create a vertical container for the toggle menu buttons
-        vertical_menu = widgets.VBox(
-            [
-                widgets.ToggleButton(description="Title", value=False, tooltip="Title Control"),
-                widgets.ToggleButton(description="Image", value=False, tooltip="Image Control"),
-                widgets.ToggleButton(description="COG", value=False, tooltip="COG Control"),
-                widgets.ToggleButton(description="JSON", value=False, tooltip="GeoJSON Control"),
-                # Removed basemap_dropdown and apply_basemap_button
+            name = change["new"]
+            if name not in panel_builders:
+                show_panel(None)
+                return
+            control = panel_controls.get(name)
+            if control is None:
+                control = panel_controls[name] = panel_builders[name]()
+                managed_controls.add(control)
+            show_panel(control)
+
+        # A single set of toggle buttons, so each selection fires one event
+        vertical_menu = widgets.ToggleButtons(
+            options=["None", "Title", "Image", "COG", "JSON"],
+            value="None",
+            tooltips=[
+                "Close the panel",
+                "Title Control",
+                "Image Control",
+                "COG Control",
+                "GeoJSON Control",
             ],
+            style={"button_width": "140px"},
             layout=widgets.Layout(
                 display="flex",
-                flex_flow="column",
-                align_items="stretch",
                 width="150px",  # Adjust width as needed
             ),
         )
-
-        # Attach the toggle_controls function to each button in the vertical menu
-        for button in vertical_menu.children:
-            button.observe(toggle_controls, names="value")
+        vertical_menu.observe(toggle_controls, names="value")
 
         # Collapsible menu button
         collapse_button = widgets.Button(
@@ -489,10 +1867,8 @@ class Map(ipyleaflet.Map):
                 vertical_menu.layout.display = "none"
                 collapse_button.icon = "eye"
 
-                # Remove all active controls
-                for control in [image_control, cog_control, title_control_panel_control, geojson_control]:
-                    if control in self.controls:
-                        self.remove_control(control)
+                # Deselect the menu, which also removes the open panel
+                vertical_menu.value = "None"
 
         collapse_button.on_click(toggle_menu_visibility)
 
@@ -522,100 +1898,8 @@ class Map(ipyleaflet.Map):
                 from ipyleaflet import Map
                 Map.save(self, html_file)
                 print(f"Map saved as {html_file}. Open it in a browser to view.")
-            except Exception as e:
-                print(f"Error saving map: {e}")
+            except Exception:
+                logger.exception("Error saving map")
 
         save_button.on_click(save_map_as_html)
         self.add_control(ipyleaflet.WidgetControl(widget=save_button, position="bottomleft"))
-
-        # Remove GeoParquet-related widgets and controls
-        # Removed geoparquet_chooser
-        # Removed geoparquet_control_panel
-        # Removed geoparquet_control
-
-        # Toggle menu
-        toggle_menu = widgets.ToggleButtons(
-            options=["None", "Title", "Image", "COG", "JSON"],  # Removed "GeoParquet" option
-            value=None,
-            description="",
-            style={"button_width": "80px"},
-        )
-
-        def toggle_controls(change):
-            for control in [image_control, cog_control, title_control_panel_control, geojson_control]:
-                if control in self.controls:
-                    self.remove_control(control)
-
-            # Add the corresponding control based on the button pressed
-            if change["owner"].description == "Title" and change["new"]:
-                self.add_control(title_control_panel_control)
-            elif change["owner"].description == "Image" and change["new"]:
-                self.add_control(image_control)
-            elif change["new"] == "COG":
-                self.add_control(cog_control)
-            elif change["owner"].description == "JSON" and change["new"]:
-                self.add_control(geojson_control)
-
-        toggle_menu.observe(toggle_controls, names="value")
-
-        # Create a vertical container for the toggle menu buttons
-        vertical_menu = widgets.VBox(
-            [
-                widgets.ToggleButton(description="Title", value=False, tooltip="Title Control"),
-                widgets.ToggleButton(description="Image", value=False, tooltip="Image Control"),
-                widgets.ToggleButton(description="COG", value=False, tooltip="COG Control"),
-                widgets.ToggleButton(description="JSON", value=False, tooltip="GeoJSON Control"),
-                # Removed GeoParquet button
-            ],
-            layout=widgets.Layout(
-                display="flex",
-                flex_flow="column",
-                align_items="stretch",
-                width="150px",  # Adjust width as needed
-            ),
-        )
-
-        # Attach the toggle_controls function to each button in the vertical menu
-        for button in vertical_menu.children:
-            button.observe(toggle_controls, names="value")
-
-        # Collapsible menu button
-        collapse_button = widgets.Button(
-            description="",
-            button_style="warning",
-            tooltip="Click to hide/show the menu",
-            icon="eye-slash",
-            layout=widgets.Layout(width="40px", height="40px"),
-        )
-
-        def toggle_menu_visibility(b):
-            """
-            Toggles the visibility of the vertical menu and removes all controls when collapsed.
-
-            Args:
-                b: The button click event.
-
-            Returns:
-                None
-            """
-            if vertical_menu.layout.display == "none":
-                # Show the vertical menu
-                vertical_menu.layout.display = "flex"
-                collapse_button.icon = "eye-slash"
-            else:
-                # Hide the vertical menu and remove all controls
-                vertical_menu.layout.display = "none"
-                collapse_button.icon = "eye"
-
-                # Remove all active controls
-                for control in [image_control, cog_control, title_control_panel_control, geojson_control]:
-                    if control in self.controls:
-                        self.remove_control(control)
-
-        collapse_button.on_click(toggle_menu_visibility)
-
-        # Add the vertical menu and collapse button to the map
-        self.add_control(ipyleaflet.WidgetControl(widget=collapse_button, position="topright"))
-        self.add_control(ipyleaflet.WidgetControl(widget=vertical_menu, position="topright"))
-
-
@@ -1,12 +1,27 @@
 """Main module."""
 
+import functools
+
 import ipyleaflet
-import geopandas as gpd
 from ipyleaflet import GeoJSON
 import ipywidgets as widgets
-import xarray as xr
-import matplotlib.pyplot as plt
-import numpy as np
+
+from .common import gdf_to_geojson, read_vector, to_wgs84
+
+
+@functools.lru_cache(maxsize=None)
+def _basemap_url(name):
+    """
+    Looks up the tile URL of a dotted basemap name such as "CartoDB.Positron".
+
+    Args:
+        name (str): The basemap name in ipyleaflet.basemaps.
+
+    Returns:
+        str: The tile URL template of the basemap.
+    """
+    return functools.reduce(getattr, name.split("."), ipyleaflet.basemaps).build_url()
+
 
 class Map(ipyleaflet.Map):
     """A custom map class extending ipyleaflet.Map."""
@@ -32,7 +47,7 @@ class Map(ipyleaflet.Map):
             basemap (str): The name of the basemap to add. Must be a valid basemap
                 available in ipyleaflet.basemaps.
         """
-        url = eval(f"ipyleaflet.basemaps.{basemap}").build_url()
+        url = _basemap_url(basemap)
         layer = ipyleaflet.TileLayer(url=url, name=basemap)
         self.add_layer(layer)
 
@@ -65,7 +80,7 @@ class Map(ipyleaflet.Map):
         url = (
             f"https://mt1.google.com/vt/lyrs={map_type.lower()}&x={{x}}&y={{y}}&z={{z}}"
         )
-        layer = ipyleaflet.TileLayer(ur1=url, name="Google Map")
+        layer = ipyleaflet.TileLayer(url=url, name="Google Map")
         self.add(layer)
 
     def add_vector(self, data, **kwargs):
@@ -76,16 +91,14 @@ class Map(ipyleaflet.Map):
             data (str): The path or URL to the vector data (e.g., GeoJSON file).
             **kwargs: Additional keyword arguments for ipyleaflet.GeoJSON.
         """
-        import geopandas as gpd
-
         # Load the data into a GeoDataFrame
-        gdf = gpd.read_file(data)
+        gdf = read_vector(data)
 
         # Reproject to EPSG:4326
-        gdf = gdf.to_crs(epsg=4326)
+        gdf = to_wgs84(gdf)
 
         # Convert to GeoJSON
-        geojson = gdf.__geo_interface__
+        geojson = gdf_to_geojson(gdf)
 
         # Add the GeoJSON layer to the map
         self.add_layer(ipyleaflet.GeoJSON(data=geojson, **kwargs))
@@ -145,8 +158,8 @@ class Map(ipyleaflet.Map):
             file_name (str, optional): The file name to save the plot. Defaults to None.
             **kwargs: Additional keyword arguments for ipyleaflet.GeoJSON.
         """
-        import geopandas as gpd
         import matplotlib.pyplot as plt
+        import xarray as xr
 
         # Load the dataset into an xarray Dataset
         ds = xr.open_dataset(dataset)
@@ -0,0 +1,102 @@
+#!/usr/bin/env python
+
+"""Tests for the `salmongis.common` module."""
+
+import sys
+import os
+import unittest
+import warnings
+from unittest import mock
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import geopandas as gpd
+from shapely.geometry import Point
+
+from salmongis import common
+
+DATASETS = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'Datasets'))
+NYBB = os.path.join(DATASETS, 'nybb.geojson')
+
+
+class TestCommon(unittest.TestCase):
+    """Tests for the vector helpers in `salmongis.common`."""
+
+    def test_read_vector(self):
+        """The whole file is read into a GeoDataFrame."""
+        gdf = common.read_vector(NYBB)
+        self.assertIsInstance(gdf, gpd.GeoDataFrame)
+        self.assertEqual(len(gdf), 5)
+        self.assertIsNotNone(gdf.crs)
+
+    def test_read_vector_engine(self):
+        """Keyword arguments such as max_features are passed on to the reader."""
+        self.assertEqual(len(common.read_vector(NYBB, max_features=2)), 2)
+
+    def test_gdf_to_geojson(self):
+        """The GeoDataFrame becomes a FeatureCollection with its properties."""
+        gdf = gpd.GeoDataFrame({'name': ['a', 'b']}, geometry=[Point(1, 2), None], crs='EPSG:4326')
+        geojson = common.gdf_to_geojson(gdf)
+        self.assertEqual(geojson['type'], 'FeatureCollection')
+        first, second = geojson['features']
+        self.assertEqual(first['id'], '0')
+        self.assertEqual(first['properties'], {'name': 'a'})
+        self.assertEqual(first['geometry'], {'type': 'Point', 'coordinates': [1.0, 2.0]})
+        self.assertIsNone(second['geometry'])
+
+    def test_gdf_to_geojson_matches_geo_interface(self):
+        """The result has the same geometries as gdf.__geo_interface__."""
+        gdf = common.read_vector(NYBB).to_crs(epsg=4326)
+        geojson = common.gdf_to_geojson(gdf)
+        expected = gdf.__geo_interface__
+        self.assertEqual(len(geojson['features']), len(expected['features']))
+        self.assertEqual(geojson['features'][0]['geometry']['type'], expected['features'][0]['geometry']['type'])
+
+    def test_to_wgs84(self):
+        """Data is reprojected to EPSG:4326."""
+        gdf = gpd.GeoDataFrame(geometry=[Point(500000, 0)], crs='EPSG:32631')
+        result = common.to_wgs84(gdf)
+        self.assertEqual(result.crs.to_epsg(), 4326)
+        self.assertAlmostEqual(result.geometry[0].x, 3.0)
+
+    def test_to_wgs84_unchanged(self):
+        """Data already in EPSG:4326 is returned as is."""
+        gdf = gpd.GeoDataFrame(geometry=[Point(1, 2)], crs='EPSG:4326')
+        self.assertIs(common.to_wgs84(gdf), gdf)
+
+    def test_to_wgs84_without_crs(self):
+        """Data without a CRS is returned unchanged with a warning."""
+        gdf = gpd.GeoDataFrame(geometry=[Point(1, 2)])
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter('always')
+            self.assertIs(common.to_wgs84(gdf), gdf)
+        self.assertEqual(len(caught), 1)
+
+    def test_iter_vector(self):
+        """Chunks hold at most chunksize features and add up to the whole file."""
+        chunks = list(common.iter_vector(NYBB, 2))
+        self.assertTrue(all(len(chunk) <= 2 for chunk in chunks))
+        self.assertEqual(sum(len(chunk) for chunk in chunks), 5)
+        self.assertEqual(chunks[0].crs, common.read_vector(NYBB).crs)
+
+    def test_iter_vector_paged(self):
+        """Without the Arrow reader the file is paged with skip_features."""
+        with mock.patch.object(common, '_arrow_available', return_value=False):
+            chunks = list(common.iter_vector(NYBB, 2))
+        self.assertEqual([len(chunk) for chunk in chunks], [2, 2, 1])
+        self.assertEqual(chunks[0].crs, common.read_vector(NYBB).crs)
+
+    def test_iter_vector_without_from_arrow(self):
+        """geopandas releases without GeoDataFrame.from_arrow fall back to paging."""
+        def has_attr(obj, name):
+            return name != 'from_arrow' and hasattr(obj, name)
+
+        # Hide from_arrow from the check only, since geopandas itself still needs it
+        with mock.patch.object(common, 'read_vector', wraps=common.read_vector) as read_vector, \
+                mock.patch.object(common, 'hasattr', side_effect=has_attr, create=True):
+            chunks = list(common.iter_vector(NYBB, 2))
+        self.assertEqual(sum(len(chunk) for chunk in chunks), 5)
+        self.assertTrue(read_vector.called)
+
+
+if __name__ == '__main__':
+    unittest.main()
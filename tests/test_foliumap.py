@@ -0,0 +1,195 @@
+#!/usr/bin/env python
+
+"""Tests for the `salmongis.foliumap` module."""
+
+import sys
+import os
+import json
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import geopandas as gpd
+from shapely.geometry import Point
+
+from salmongis import foliumap
+
+DATASETS = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'Datasets'))
+
+POINT = {'type': 'Feature', 'properties': {'id': 1}, 'geometry': {'type': 'Point', 'coordinates': [1, 2]}}
+NO_GEOMETRY = {'type': 'Feature', 'properties': {'id': 2}, 'geometry': None}
+
+
+class TestAddGeoJSON(unittest.TestCase):
+    """Tests for `Map.add_geojson`."""
+
+    def test_null_geometry(self):
+        """Features without a geometry are skipped when zooming to the layer."""
+        m = foliumap.Map()
+        with mock.patch.object(m, 'fit_bounds') as fit_bounds:
+            m.add_geojson({'type': 'FeatureCollection', 'features': [POINT, NO_GEOMETRY]})
+        fit_bounds.assert_called_once_with([[2, 1], [2, 1]])
+
+    def test_no_coordinates(self):
+        """Data without coordinates is added without zooming."""
+        m = foliumap.Map()
+        with mock.patch.object(m, 'fit_bounds') as fit_bounds:
+            m.add_geojson({'type': 'FeatureCollection', 'features': [NO_GEOMETRY]})
+        fit_bounds.assert_not_called()
+
+
+class TestReadWGS84GeoJSON(unittest.TestCase):
+    """Tests for `_read_wgs84_geojson`."""
+
+    def setUp(self):
+        """Creates a temporary directory."""
+        self.tmp = Path(tempfile.mkdtemp())
+
+    def tearDown(self):
+        """Removes the temporary directory."""
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def read(self, crs):
+        """Writes a FeatureCollection with the given crs member and reads it back."""
+        path = self.tmp / 'data.geojson'
+        path.write_text(json.dumps({'type': 'FeatureCollection', 'crs': crs, 'features': [POINT]}))
+        return foliumap._read_wgs84_geojson(str(path))
+
+    def test_wgs84(self):
+        """WGS84 files, including ones with a null crs, are parsed directly."""
+        for crs in (None, {}, {'properties': None}, {'properties': {'name': 'urn:ogc:def:crs:OGC:1.3:CRS84'}}):
+            self.assertEqual(self.read(crs)['features'], [POINT])
+
+    def test_other_crs(self):
+        """Files in another CRS are left to the GeoDataFrame path."""
+        self.assertIsNone(self.read({'type': 'name', 'properties': {'name': 'EPSG:3857'}}))
+
+
+class TestAddVectors(unittest.TestCase):
+    """Tests for `Map.add_vectors`."""
+
+    def test_add_vectors(self):
+        """Several files become one feature group and the map fits their bounds."""
+        m = foliumap.Map()
+        paths = [os.path.join(DATASETS, 'nybb.geojson'), os.path.join(DATASETS, 'schools-list.geojson')]
+        with mock.patch.object(m, 'fit_bounds') as fit_bounds:
+            m.add_vectors(paths, group_name='both', hover_style={'color': 'red'})
+        groups = [c for c in m._children.values() if getattr(c, 'layer_name', None) == 'both']
+        self.assertEqual(len(groups), 1)
+        self.assertEqual(len(groups[0]._children), 1)
+        fit_bounds.assert_called_once()
+
+    def test_add_vectors_empty(self):
+        """An empty list adds nothing."""
+        m = foliumap.Map()
+        children = list(m._children)
+        m.add_vectors([])
+        self.assertEqual(list(m._children), children)
+
+
+class TestChunked(unittest.TestCase):
+    """Tests for loading vector files in chunks."""
+
+    def test_add_vector_chunked(self):
+        """Chunks share one feature group and the map fits the union of their bounds."""
+        path = os.path.join(DATASETS, 'nybb.geojson')
+        m = foliumap.Map()
+        with mock.patch.object(m, 'fit_bounds') as fit_bounds:
+            m.add_vector(path, chunksize=2, name='boroughs', hover_style={'color': 'red'})
+        groups = [c for c in m._children.values() if getattr(c, 'layer_name', None) == 'boroughs']
+        self.assertEqual(len(groups), 1)
+        self.assertEqual(len(groups[0]._children), 3)
+
+        minx, miny, maxx, maxy = foliumap.to_wgs84(foliumap.read_vector(path)).total_bounds
+        (south, west), (north, east) = fit_bounds.call_args.args[0]
+        for actual, expected in zip((south, west, north, east), (miny, minx, maxy, maxx)):
+            self.assertAlmostEqual(actual, expected)
+
+    def test_add_vector_chunked_no_zoom(self):
+        """zoom_to_layer=False leaves the view alone."""
+        m = foliumap.Map()
+        with mock.patch.object(m, 'fit_bounds') as fit_bounds:
+            m.add_vector(os.path.join(DATASETS, 'nybb.geojson'), chunksize=2, zoom_to_layer=False)
+        fit_bounds.assert_not_called()
+
+
+class TestReadShpCached(unittest.TestCase):
+    """Tests for `_read_shp_cached`."""
+
+    def setUp(self):
+        """Creates a temporary directory and points the cache at it."""
+        self.tmp = Path(tempfile.mkdtemp())
+        patcher = mock.patch.object(foliumap, '_CACHE_DIR', self.tmp / 'cache')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        """Removes the temporary directory."""
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def write_shp(self, name):
+        """Writes a small shapefile, renaming it and its sidecars to name's stem and suffix case."""
+        gdf = gpd.GeoDataFrame({'id': [1, 2]}, geometry=[Point(0, 0), Point(1, 1)], crs='EPSG:4326')
+        gdf.to_file(self.tmp / 'points.shp', engine='pyogrio')
+        stem, upper = Path(name).stem, Path(name).suffix.isupper()
+        for src in list(self.tmp.glob('points.*')):
+            src.rename(self.tmp / (stem + (src.suffix.upper() if upper else src.suffix)))
+        return str(self.tmp / name)
+
+    def cached_copies(self):
+        """Returns the GeoParquet copies in the cache."""
+        return list((self.tmp / 'cache' / 'shp').glob('*.parquet'))
+
+    @unittest.skipUnless(foliumap._arrow_available(), 'needs pyarrow')
+    def test_cached(self):
+        """The first read writes a GeoParquet copy that later reads return."""
+        path = self.write_shp('points.shp')
+        self.assertEqual(len(foliumap._read_shp_cached(path)), 2)
+        self.assertEqual(len(self.cached_copies()), 1)
+        with mock.patch.object(foliumap, 'read_vector') as read_vector:
+            self.assertEqual(sorted(foliumap._read_shp_cached(path)['id']), [1, 2])
+        read_vector.assert_not_called()
+
+    @unittest.skipUnless(foliumap._arrow_available(), 'needs pyarrow')
+    def test_stale_copy(self):
+        """A copy older than the shapefile is rewritten."""
+        path = self.write_shp('points.shp')
+        foliumap._read_shp_cached(path)
+        (copy,) = self.cached_copies()
+        os.utime(copy, (0, 0))
+        with mock.patch.object(foliumap, 'read_vector', wraps=foliumap.read_vector) as read_vector:
+            foliumap._read_shp_cached(path)
+        read_vector.assert_called_once()
+        self.assertGreater(copy.stat().st_mtime, 0)
+
+    def test_upper_case(self):
+        """Shapefiles with upper-case suffixes are read like lower-case ones."""
+        path = self.write_shp('POINTS.SHP')
+        self.assertEqual(sorted(foliumap._read_shp_cached(path)['id']), [1, 2])
+        if foliumap._arrow_available():
+            self.assertEqual(len(self.cached_copies()), 1)
+
+    def test_corrupt_copy(self):
+        """An unreadable copy falls back to the shapefile."""
+        path = self.write_shp('points.shp')
+        foliumap._read_shp_cached(path)
+        for copy in self.cached_copies():
+            copy.write_bytes(b'not parquet')
+        self.assertEqual(len(foliumap._read_shp_cached(path)), 2)
+
+    def test_add_shp_cache_is_opt_in(self):
+        """add_shp only writes a copy when asked to."""
+        path = self.write_shp('points.shp')
+        m = foliumap.Map()
+        m.add_shp(path)
+        self.assertEqual(self.cached_copies(), [])
+        m.add_shp(path, cache=True)
+        if foliumap._arrow_available():
+            self.assertEqual(len(self.cached_copies()), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,592 @@
+#!/usr/bin/env python
+
+"""Tests for the `salmongis.graphs` module."""
+
+import sys
+import os
+import asyncio
+import json
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import ipyfilechooser as filechooser
+import ipywidgets as widgets
+
+from salmongis import graphs
+
+DATASETS = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'Datasets'))
+
+
+def point_feature(id, x, y):
+    """Returns a GeoJSON point feature."""
+    return {'type': 'Feature', 'properties': {'id': id}, 'geometry': {'type': 'Point', 'coordinates': [x, y]}}
+
+
+def line_feature(vertices):
+    """Returns a GeoJSON line feature with the given number of almost collinear vertices."""
+    coordinates = [[i, 0.001 * (i % 2)] for i in range(vertices - 1)] + [[vertices - 1, 0]]
+    return {'type': 'Feature', 'properties': {'id': 1}, 'geometry': {'type': 'LineString', 'coordinates': coordinates}}
+
+
+def collection(*features):
+    """Returns a GeoJSON FeatureCollection."""
+    return {'type': 'FeatureCollection', 'features': list(features)}
+
+
+class TestGeoJSONHelpers(unittest.TestCase):
+    """Tests for the GeoJSON helpers of `salmongis.graphs`."""
+
+    def test_geojson_bounds(self):
+        """Bounds are returned as [[south, west], [north, east]]."""
+        data = collection(point_feature(1, -10, 5), point_feature(2, 20, -3))
+        self.assertEqual(graphs._geojson_bounds(data), [[-3, -10], [5, 20]])
+        self.assertIsNone(graphs._geojson_bounds(collection()))
+
+    def test_geojson_bounds_null_geometry(self):
+        """Features without a geometry are skipped."""
+        empty = {'type': 'Feature', 'properties': {}, 'geometry': None}
+        data = collection(point_feature(1, 1, 2), empty)
+        self.assertEqual(graphs._geojson_bounds(data), [[2, 1], [2, 1]])
+        self.assertIsNone(graphs._geojson_bounds(collection(empty)))
+
+    def test_parse_geojson(self):
+        """Plain GeoJSON is parsed as is."""
+        content = json.dumps(collection(point_feature(1, 0, 0))).encode()
+        self.assertEqual(graphs._parse_geojson(content, 'a.geojson'), collection(point_feature(1, 0, 0)))
+
+    def test_parse_geojson_ndjson(self):
+        """Newline-delimited features are collected into a FeatureCollection."""
+        content = b'\n'.join([json.dumps(point_feature(1, 0, 0)).encode(), b'', json.dumps(point_feature(2, 1, 1)).encode()])
+        data = graphs._parse_geojson(content, 'https://example.com/a.NDJSON?x=1')
+        self.assertEqual(data, collection(point_feature(1, 0, 0), point_feature(2, 1, 1)))
+
+    def test_parse_geojson_text_sequence(self):
+        """RFC 8142 record separators are accepted."""
+        content = b''.join(b'\x1e' + json.dumps(point_feature(i, i, i)).encode() + b'\n' for i in range(3))
+        for suffix in graphs._GEOJSON_SEQ_SUFFIXES:
+            self.assertEqual(len(graphs._parse_geojson(content, 'a' + suffix)['features']), 3)
+
+    def test_load_ndjson_file(self):
+        """Local newline-delimited files are loaded through the same parser."""
+        tmp = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, tmp, True)
+        path = tmp / 'a.geojsonl'
+        path.write_bytes(json.dumps(point_feature(1, 0, 0)).encode() + b'\n')
+        self.assertEqual(graphs._load_geojson(str(path)), collection(point_feature(1, 0, 0)))
+
+    def test_simplify_small_layer(self):
+        """Layers below _SIMPLIFY_MIN_BYTES are returned unchanged."""
+        data = collection(line_feature(100))
+        self.assertIs(graphs._simplify_geojson(data, 1), data)
+
+    def test_simplify_large_layer(self):
+        """Layers above _SIMPLIFY_MIN_BYTES lose the vertices below the tolerance."""
+        data = collection(line_feature(60000), {'type': 'Feature', 'properties': {}, 'geometry': None})
+        self.assertGreater(len(json.dumps(data)), graphs._SIMPLIFY_MIN_BYTES)
+        result = graphs._simplify_geojson(data, 1)
+        self.assertIsNot(result, data)
+        self.assertEqual(result['features'][0]['geometry']['coordinates'], [[0.0, 0.0], [59999.0, 0.0]])
+        self.assertEqual(result['features'][0]['properties'], {'id': 1})
+        self.assertIsNone(result['features'][1]['geometry'])
+        self.assertEqual(len(data['features'][0]['geometry']['coordinates']), 60000)
+
+    def test_simplify_points(self):
+        """Point layers are never simplified."""
+        data = collection(point_feature(1, 0, 0))
+        with mock.patch.object(graphs, '_SIMPLIFY_MIN_BYTES', 0):
+            self.assertIs(graphs._simplify_geojson(data, 1), data)
+
+
+class TestTilePrefetch(unittest.TestCase):
+    """Tests for the COG tile warm-up of `salmongis.graphs`."""
+
+    def make_client(self):
+        """Returns a stand-in tile client covering most of the world."""
+        client = mock.Mock(default_zoom=2)
+        client.center.return_value = (10, 10)
+        client.bounds.return_value = (-60, 60, -120, 120)
+        return client
+
+    def rendered(self, client):
+        """Returns the tiles a stand-in client rendered, in order."""
+        return [c.args for c in client.tile.call_args_list]
+
+    def test_tile_index(self):
+        """Points map to their web mercator tile, clamped to the tile grid."""
+        self.assertEqual(graphs._tile_index(0, 0, 0), (0, 0))
+        self.assertEqual(graphs._tile_index(0.1, 0.1, 1), (1, 0))
+        self.assertEqual(graphs._tile_index(-0.1, -0.1, 1), (0, 1))
+        self.assertEqual(graphs._tile_index(89.9, 180, 2), (3, 0))
+        self.assertEqual(graphs._tile_index(-89.9, -180, 2), (0, 3))
+
+    def test_center_first(self):
+        """The warm-up renders the center tile first and never renders a tile twice."""
+        client = self.make_client()
+        graphs._prefetch_tiles(client, center=True, max_tiles=100)
+        tiles = self.rendered(client)
+        self.assertEqual(tiles[0], (2, 2, 1))
+        self.assertEqual(len(tiles), len(set(tiles)))
+        self.assertEqual({z for z, _, _ in tiles}, {0, 1, 2})
+
+    def test_overviews_skip_center(self):
+        """Without the warm-up the center tile is left to the browser."""
+        client = self.make_client()
+        graphs._prefetch_tiles(client, max_tiles=100)
+        self.assertNotIn((2, 2, 1), self.rendered(client))
+
+    def test_max_tiles(self):
+        """No more than max_tiles tiles are rendered."""
+        client = self.make_client()
+        graphs._prefetch_tiles(client, center=True, max_tiles=3)
+        self.assertEqual(len(self.rendered(client)), 3)
+
+    def test_errors_are_ignored(self):
+        """A tile that fails to render does not stop the others."""
+        client = self.make_client()
+        client.tile.side_effect = [RuntimeError('no data'), None, None]
+        graphs._prefetch_tiles(client, center=True, max_tiles=3)
+        self.assertEqual(client.tile.call_count, 3)
+
+    def test_cog_client(self):
+        """A prewarmed COG goes through the single prefetch pass, center tile included."""
+        m = graphs.Map()
+        client = self.make_client()
+        done = threading.Event()
+        prefetch = graphs._prefetch_tiles
+
+        def prefetch_tiles(*args, **kwargs):
+            prefetch(*args, **kwargs)
+            done.set()
+
+        with mock.patch.object(graphs, '_start_tile_client', return_value=client) as start, \
+                mock.patch.object(graphs, '_prefetch_tiles', side_effect=prefetch_tiles):
+            m._cog_client('https://example.com/a.tif', prefetch=True).result()
+            self.assertIs(m._cog_client('https://example.com/a.tif').result(), client)
+            self.assertTrue(done.wait(5))
+        start.assert_called_once_with('https://example.com/a.tif')
+        tiles = self.rendered(client)
+        self.assertEqual(tiles[0], (2, 2, 1))
+        self.assertEqual(len(tiles), len(set(tiles)))
+        m.close()
+
+
+def find_menu(m):
+    """Returns the panel menu that add_combined_ui put on a map."""
+    for control in m.controls:
+        if isinstance(getattr(control, 'widget', None), widgets.ToggleButtons):
+            return control.widget
+    raise AssertionError('The map has no panel menu')
+
+
+def walk(items):
+    """Yields the widgets inside the given controls and widgets, depth first."""
+    for item in items:
+        widget = getattr(item, 'widget', item)
+        yield widget
+        yield from walk(getattr(widget, 'children', ()))
+
+
+class TestCombinedUI(unittest.TestCase):
+    """Tests for `Map.add_combined_ui`."""
+
+    def setUp(self):
+        """Creates a map."""
+        self.map = graphs.Map()
+        self.addCleanup(self.map.close)
+
+    def bounds_observers(self):
+        """Returns the observers of the map bounds."""
+        return self.map._trait_notifiers.get('bounds', {}).get('change', [])
+
+    def test_bounds_observer_replaced(self):
+        """Calling add_combined_ui again replaces the bounds observer, and close removes it."""
+        for _ in range(2):
+            self.map.add_combined_ui()
+            find_menu(self.map).value = 'JSON'
+            self.assertEqual(len(self.bounds_observers()), 1)
+        self.map.close()
+        self.assertEqual(len(self.bounds_observers()), 0)
+
+    def test_geojson_chooser_filter(self):
+        """The GeoJSON file chooser lists every supported extension."""
+        self.map.add_combined_ui()
+        find_menu(self.map).value = 'JSON'
+        (chooser,) = [w for w in walk(self.map.controls) if isinstance(w, filechooser.FileChooser)]
+        self.assertEqual(set(chooser.filter_pattern), {'*.geojson', '*.json'} | {'*' + s for s in graphs._GEOJSON_SEQ_SUFFIXES})
+
+    def test_menu(self):
+        """The menu shows one panel at a time, builds each once and closes it on None."""
+        self.map.add_combined_ui()
+        menu = find_menu(self.map)
+        base = list(self.map.controls)
+        panels = {}
+        for name in ('Title', 'Image', 'COG', 'JSON'):
+            menu.value = name
+            added = [c for c in self.map.controls if c not in base]
+            self.assertEqual(len(added), 1)
+            panels[name] = added[0]
+        self.assertEqual(len(set(map(id, panels.values()))), 4)
+
+        menu.value = 'Image'
+        self.assertEqual([c for c in self.map.controls if c not in base], [panels['Image']])
+        menu.value = 'None'
+        self.assertEqual(list(self.map.controls), base)
+
+    def test_geojson_select_and_clear(self):
+        """Selecting a preset shows it in one reused layer, and the empty entry removes it."""
+        options = {
+            'Select a GeoJSON': None,
+            'Boroughs': os.path.join(DATASETS, 'nybb.geojson'),
+            'Schools': os.path.join(DATASETS, 'schools-list.geojson'),
+        }
+        self.map.add_combined_ui(geojson_options=options)
+        find_menu(self.map).value = 'JSON'
+        (dropdown,) = [w for w in walk(self.map.controls) if isinstance(w, widgets.Dropdown) and w.description == 'GeoJSON:']
+
+        with mock.patch.object(self.map, 'fit_bounds') as fit_bounds:
+            dropdown.value = 'Boroughs'
+            layer = self.map._ov_geojson
+            self.assertIn(layer, self.map.layers)
+            self.assertEqual(len(layer.data['features']), 5)
+
+            dropdown.value = 'Schools'
+            self.assertIs(self.map._ov_geojson, layer)
+            self.assertNotEqual(len(layer.data['features']), 5)
+            self.assertEqual(fit_bounds.call_count, 2)
+
+            dropdown.value = 'Select a GeoJSON'
+            self.assertIsNone(self.map._ov_geojson)
+            self.assertNotIn(layer, self.map.layers)
+
+
+def response(status_code, content=b'', headers=None):
+    """Returns a stand-in HTTP response."""
+    return mock.Mock(status_code=status_code, content=content, headers=headers or {})
+
+
+class TestFetchGeoJSON(unittest.TestCase):
+    """Tests for the download and revalidation of remote GeoJSON."""
+
+    URL = 'https://example.com/data.geojson'
+
+    def setUp(self):
+        """Points the disk cache at a temporary directory and empties the memory cache."""
+        self.tmp = Path(tempfile.mkdtemp())
+        patcher = mock.patch.object(graphs, '_CACHE_DIR', self.tmp)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        graphs._GEOJSON_CACHE.clear()
+        self.addCleanup(graphs._GEOJSON_CACHE.clear)
+        patcher = mock.patch.object(graphs._session(), 'get')
+        self.get = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        """Removes the temporary directory."""
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def test_revalidation(self):
+        """A second fetch sends the validators and reuses the data on 304."""
+        content = json.dumps(collection(point_feature(1, 0, 0))).encode()
+        self.get.return_value = response(200, content, {'ETag': '"v1"', 'Last-Modified': 'Mon, 01 Jan 2024 00:00:00 GMT'})
+        data = graphs._fetch_geojson(self.URL)
+        self.assertEqual(data['features'][0]['properties']['id'], 1)
+        self.assertEqual(self.get.call_args.kwargs['headers'], {})
+
+        self.get.return_value = response(304)
+        self.assertIs(graphs._fetch_geojson(self.URL), data)
+        self.assertEqual(self.get.call_args.kwargs['headers'], {
+            'If-None-Match': '"v1"',
+            'If-Modified-Since': 'Mon, 01 Jan 2024 00:00:00 GMT',
+        })
+
+    def test_changed(self):
+        """A 200 response to a revalidation replaces the cached data."""
+        self.get.return_value = response(200, json.dumps(collection()).encode(), {'ETag': '"v1"'})
+        graphs._fetch_geojson(self.URL)
+        self.get.return_value = response(200, json.dumps(collection(point_feature(2, 0, 0))).encode(), {'ETag': '"v2"'})
+        self.assertEqual(len(graphs._fetch_geojson(self.URL)['features']), 1)
+        self.get.return_value = response(304)
+        self.assertEqual(len(graphs._fetch_geojson(self.URL)['features']), 1)
+        self.assertEqual(self.get.call_args.kwargs['headers'], {'If-None-Match': '"v2"'})
+
+    def test_revalidation_from_disk(self):
+        """After a restart the validators are read back from the disk cache."""
+        self.get.return_value = response(200, json.dumps(collection()).encode(), {'ETag': '"v1"'})
+        graphs._fetch_geojson(self.URL)
+        graphs._GEOJSON_CACHE.clear()
+        self.get.return_value = response(304)
+        self.assertEqual(graphs._fetch_geojson(self.URL), collection())
+        self.assertEqual(self.get.call_args.kwargs['headers'], {'If-None-Match': '"v1"'})
+
+    def test_offline(self):
+        """Connection errors and timeouts fall back to the cached copy."""
+        import requests
+
+        self.get.return_value = response(200, json.dumps(collection()).encode(), {'ETag': '"v1"'})
+        graphs._fetch_geojson(self.URL)
+        for error in (requests.ConnectionError(), requests.ReadTimeout()):
+            graphs._GEOJSON_CACHE.clear()
+            self.get.side_effect = error
+            self.assertEqual(graphs._fetch_geojson(self.URL), collection())
+
+    def test_offline_without_cache(self):
+        """Without a cached copy the error is raised."""
+        import requests
+
+        self.get.side_effect = requests.ConnectTimeout()
+        with self.assertRaises(requests.Timeout):
+            graphs._fetch_geojson(self.URL)
+
+
+class TestDiskCache(unittest.TestCase):
+    """Tests for the disk cache of downloaded GeoJSON."""
+
+    def setUp(self):
+        """Points the cache at a temporary directory."""
+        self.tmp = Path(tempfile.mkdtemp())
+        patcher = mock.patch.object(graphs, '_CACHE_DIR', self.tmp)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        """Removes the temporary directory."""
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def test_round_trip(self):
+        """A written file is read back with its validators."""
+        url = 'https://example.com/a.geojson'
+        graphs._write_cache(url, json.dumps(collection(point_feature(1, 0, 0))).encode(), '"etag"', 'Mon, 01 Jan 2024 00:00:00 GMT')
+        etag, last_modified, data = graphs._read_cache(url)
+        self.assertEqual(etag, '"etag"')
+        self.assertEqual(last_modified, 'Mon, 01 Jan 2024 00:00:00 GMT')
+        self.assertEqual(data['features'][0]['properties']['id'], 1)
+
+    def test_missing(self):
+        """URLs that were never written are not cached."""
+        self.assertIsNone(graphs._read_cache('https://example.com/missing.geojson'))
+
+    def test_concurrent_writes(self):
+        """Concurrent writers each use their own temporary file and leave a complete copy."""
+        url = 'https://example.com/a.geojson'
+        bodies = [json.dumps(collection(*[point_feature(i, 0, 0)] * (i + 1))).encode() for i in range(8)]
+        threads = [threading.Thread(target=graphs._write_cache, args=(url, body, str(i), None)) for i, body in enumerate(bodies)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(list(self.tmp.glob('*.tmp')), [])
+        _, _, data = graphs._read_cache(url)
+        self.assertIn(json.dumps(data).encode(), [json.dumps(json.loads(body)).encode() for body in bodies])
+
+    def test_failed_write(self):
+        """A failed write leaves neither a temporary file nor a partial copy."""
+        url = 'https://example.com/a.geojson'
+        with mock.patch.object(graphs.os, 'replace', side_effect=OSError('disk full')):
+            graphs._write_cache(url, b'{}', None, None)
+        self.assertEqual(list(self.tmp.iterdir()), [])
+        self.assertIsNone(graphs._read_cache(url))
+
+    def test_eviction(self):
+        """The least recently used files are dropped beyond the size limit."""
+        with mock.patch.object(graphs, '_CACHE_MAX_BYTES', 250):
+            for i in range(4):
+                url = 'https://example.com/%d.geojson' % i
+                graphs._write_cache(url, b'{}' + b' ' * 98, None, None)
+                body_path, _ = graphs._cache_paths(url)
+                os.utime(body_path, (i, i))
+        self.assertEqual(len(list(self.tmp.glob('*.body'))), 2)
+        self.assertEqual(len(list(self.tmp.glob('*.meta'))), 2)
+        self.assertIsNone(graphs._read_cache('https://example.com/0.geojson'))
+        self.assertIsNotNone(graphs._read_cache('https://example.com/3.geojson'))
+
+    def test_read_marks_recently_used(self):
+        """Reading a file keeps it over files that were written later."""
+        urls = ['https://example.com/%d.geojson' % i for i in range(3)]
+        with mock.patch.object(graphs, '_CACHE_MAX_BYTES', 250):
+            for i, url in enumerate(urls[:2]):
+                graphs._write_cache(url, b'{}' + b' ' * 98, None, None)
+                os.utime(graphs._cache_paths(url)[0], (i, i))
+            graphs._read_cache(urls[0])
+            graphs._write_cache(urls[2], b'{}' + b' ' * 98, None, None)
+        self.assertIsNotNone(graphs._read_cache(urls[0]))
+        self.assertIsNone(graphs._read_cache(urls[1]))
+
+
+class TestMemoryCache(unittest.TestCase):
+    """Tests for the in-memory cache of parsed remote GeoJSON."""
+
+    def setUp(self):
+        """Empties the cache."""
+        graphs._GEOJSON_CACHE.clear()
+        self.addCleanup(graphs._GEOJSON_CACHE.clear)
+
+    def test_lru(self):
+        """The least recently used URL is dropped beyond the size limit."""
+        with mock.patch.object(graphs, '_GEOJSON_CACHE_SIZE', 2):
+            graphs._memory_cache_put('a', (None, None, 'a'))
+            graphs._memory_cache_put('b', (None, None, 'b'))
+            self.assertEqual(graphs._memory_cache_get('a'), (None, None, 'a'))
+            graphs._memory_cache_put('c', (None, None, 'c'))
+        self.assertIsNone(graphs._memory_cache_get('b'))
+        self.assertEqual(list(graphs._GEOJSON_CACHE), ['a', 'c'])
+
+    def test_concurrent_puts(self):
+        """Concurrent writers never grow the cache past its size limit."""
+        def put(start):
+            for i in range(start, start + 200):
+                graphs._memory_cache_put(str(i), (None, None, i))
+
+        threads = [threading.Thread(target=put, args=(i * 200,)) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(graphs._GEOJSON_CACHE), graphs._GEOJSON_CACHE_SIZE)
+
+
+class TestDebounce(unittest.TestCase):
+    """Tests for `_debounce`."""
+
+    def test_without_loop(self):
+        """Without a running loop a burst of calls runs the callback once, on a timer thread."""
+        calls = []
+        done = threading.Event()
+
+        @graphs._debounce(delay=0.05)
+        def callback(value):
+            calls.append((value, threading.current_thread()))
+            done.set()
+
+        for value in range(5):
+            callback(value)
+        self.assertTrue(done.wait(2))
+        time.sleep(0.1)
+        self.assertEqual([value for value, _ in calls], [4])
+        self.assertIsNot(calls[0][1], threading.current_thread())
+
+    def test_with_loop(self):
+        """On a running loop a burst of calls runs the callback once, on the loop's thread."""
+        calls = []
+
+        @graphs._debounce(delay=0.05)
+        def callback(value):
+            calls.append((value, threading.current_thread()))
+
+        async def burst():
+            for value in range(5):
+                callback(value)
+                await asyncio.sleep(0.01)
+            await asyncio.sleep(0.15)
+
+        asyncio.run(burst())
+        self.assertEqual(calls, [(4, threading.current_thread())])
+
+    def test_calls_apart(self):
+        """Calls further apart than the delay each run the callback."""
+        calls = []
+
+        @graphs._debounce(delay=0.02)
+        def callback(value):
+            calls.append(value)
+
+        async def spaced():
+            for value in range(3):
+                callback(value)
+                await asyncio.sleep(0.08)
+
+        asyncio.run(spaced())
+        self.assertEqual(calls, [0, 1, 2])
+
+    def test_decorator_forms(self):
+        """The bare decorator keeps the wrapped function's name and the default delay."""
+        @graphs._debounce
+        def callback():
+            """Does nothing."""
+
+        self.assertEqual(callback.__name__, 'callback')
+        self.assertEqual(callback.__doc__, 'Does nothing.')
+
+
+class TestMaybeFit(unittest.TestCase):
+    """Tests for `Map._maybe_fit`."""
+
+    def setUp(self):
+        """Creates a map with a known view."""
+        self.map = graphs.Map()
+        self.addCleanup(self.map.close)
+        self.map.set_trait('bounds', ((0, 0), (10, 10)))
+        patcher = mock.patch.object(self.map, 'fit_bounds')
+        self.fit_bounds = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_outside_view(self):
+        """Bounds that are not fully in view are fit."""
+        self.map._maybe_fit([[5, 5], [20, 20]])
+        self.fit_bounds.assert_called_once_with([[5, 5], [20, 20]])
+
+    def test_well_covered(self):
+        """Bounds that cover a good part of the view keep it."""
+        self.map._maybe_fit([[1, 1], [9, 9]])
+        self.fit_bounds.assert_not_called()
+
+    def test_small(self):
+        """Bounds that are only a speck in the view are fit."""
+        self.map._maybe_fit([[1, 1], [2, 2]])
+        self.fit_bounds.assert_called_once()
+
+    def test_same_bounds(self):
+        """Small bounds the map was just fit to are not fit again."""
+        self.map._maybe_fit([[1, 1], [2, 2]])
+        self.map._maybe_fit([[1, 1], [2.00001, 2]])
+        self.assertEqual(self.fit_bounds.call_count, 1)
+
+    def test_unknown_view(self):
+        """Before the map is shown, the same bounds are only fit once."""
+        self.map.set_trait('bounds', ())
+        self.map._maybe_fit([[1, 1], [2, 2]])
+        self.map._maybe_fit([[1, 1], [2, 2]])
+        self.map._maybe_fit([[3, 3], [4, 4]])
+        self.assertEqual(self.fit_bounds.call_count, 2)
+
+
+class TestClose(unittest.TestCase):
+    """Tests for `Map.close`."""
+
+    def test_close(self):
+        """Closing shuts down the tile clients and the thread pool, and cancels queued work."""
+        m = graphs.Map()
+        client = mock.Mock()
+        with mock.patch.object(graphs, '_start_tile_client', return_value=client), \
+                mock.patch.object(graphs, '_prefetch_tiles'):
+            m._cog_client('https://example.com/a.tif').result()
+        pool = m._executor()
+        release = threading.Event()
+        running = [pool.submit(release.wait) for _ in range(4)]
+        queued = pool.submit(lambda: None)
+
+        m.close()
+        release.set()
+        client.shutdown.assert_called_once()
+        self.assertIsNone(m._pool)
+        self.assertTrue(queued.cancelled())
+        self.assertTrue(all(future.result(5) for future in running))
+        self.assertEqual(m._cog_clients, {})
+
+    def test_close_twice(self):
+        """A second close does nothing."""
+        m = graphs.Map()
+        m._executor()
+        m.close()
+        m.close()
+        self.assertIsNone(m._pool)
+
+
+if __name__ == '__main__':
+    unittest.main()